@@ -0,0 +1,58 @@
+import numpy as np
+from networkit import Graph
+from csr_graph import CsrGraph, csr_from_networkit
+from convergence import advance_in_chunks, default_checkpoint
+from erw_kpath_csr import ErwWalkCounter, DEFAULT_BATCH_SIZE, edge_centrality_from_array
+from werw_kpath_csr import WerwCsrWalker, DEFAULT_HUB_THRESHOLD
+from walk_kernels_numba import NUMBA_AVAILABLE, WerwNumbaWalker
+
+
+
+class CentralitySnapshot:
+    """Intermediate ranking after ``walks`` walks.
+
+    ``scores`` is a read-only view over the walker accumulator (ERW hop counts or WERW
+    weights, both ranked like omega), not a copy: it keeps changing once the stream is
+    resumed, so copy it to keep it. ``top_k`` holds the ``(u, v, score)`` rows of the k
+    best edges when the stream was asked for them.
+    """
+    walks: int
+    scores: np.ndarray
+    top_k: list
+
+    def __init__(self, csr: CsrGraph, walks: int, scores: np.ndarray, top_k: int = None):
+        self.csr = csr
+        self.walks = walks
+        self.scores = scores.view()
+        self.scores.flags.writeable = False
+        self.top_k = None if top_k is None else edge_centrality_from_array(csr, self.scores, top_k)
+
+
+def iter_erw_centrality(G: Graph, chunk_walks: int = None, top_k: int = None, max_walks: int = None,
+                        backend: str = "batch", seed=None, batch_size: int = DEFAULT_BATCH_SIZE, workers: int = 1):
+    # Runs up to max_walks (default rho = m) ERW walks, yielding a snapshot after every chunk_walks
+    csr = csr_from_networkit(G)
+    use_numba = backend == "numba" and NUMBA_AVAILABLE
+    with ErwWalkCounter(csr, 20, seed, batch_size if backend == "batch" else None, workers, use_numba) as counter:
+        max_walks = G.numberOfEdges() if max_walks is None else max_walks
+        chunk_walks = default_checkpoint(max_walks, counter.chunk * max(1, workers)) if chunk_walks is None else chunk_walks
+        # chunk_walks is rounded up to whole chunks, so the counts of a seed do not depend on it
+        chunk_walks = counter.round_to_chunks(chunk_walks)
+
+        for walks in advance_in_chunks(counter, max_walks, chunk_walks):
+            yield CentralitySnapshot(csr, walks, counter.scores(), top_k)
+
+
+def iter_werw_centrality(G: Graph, chunk_walks: int = None, top_k: int = None, max_walks: int = None,
+                         backend: str = "csr", seed=None, hub_threshold: int = DEFAULT_HUB_THRESHOLD):
+    # Runs up to max_walks (default rho = m) WERW walks, yielding a snapshot after every chunk_walks
+    csr = csr_from_networkit(G)
+    if backend == "numba" and NUMBA_AVAILABLE:
+        walker = WerwNumbaWalker(csr, 20, seed)
+    else:
+        walker = WerwCsrWalker(csr, 20, seed, hub_threshold)
+    max_walks = G.numberOfEdges() if max_walks is None else max_walks
+    chunk_walks = default_checkpoint(max_walks) if chunk_walks is None else chunk_walks
+
+    for walks in advance_in_chunks(walker, max_walks, chunk_walks):
+        yield CentralitySnapshot(csr, walks, walker.scores(), top_k)
@@ -0,0 +1,167 @@
+import os
+import numpy as np
+from networkit import Graph
+from csr_graph import CsrGraph, csr_from_networkit
+from rank_metrics import DEFAULT_TOP_K, average_ranks, rank_array, top_k_edges
+
+
+DEFAULT_MEMORY_LIMIT = 1 << 28  # Bytes of score matrix kept in RAM before switching to a memory map
+DEFAULT_BATCH_BYTES = 1 << 26  # Bytes of pairwise differences materialized at once
+MEASURES = ("displacement", "spearman", "top_k_overlap")
+
+
+
+def new_matrix(shape: tuple, dtype, path: str = None, memory_limit: int = DEFAULT_MEMORY_LIMIT):
+    # In RAM when small enough or when there is nowhere to map it, otherwise an .npy memory map at path
+    if path is None or np.prod(shape) * np.dtype(dtype).itemsize <= memory_limit:
+        return np.zeros(shape, dtype=dtype)
+    return np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+
+
+class EdgeIndex:
+    """Maps (u, v) result rows of a graph to its edge ids, whatever the endpoint order."""
+    csr: CsrGraph
+    keys: np.ndarray
+    ids: np.ndarray
+
+    def __init__(self, csr: CsrGraph):
+        self.csr = csr
+        ids = np.flatnonzero(csr.edge_u >= 0)
+        keys = csr.edge_u[ids] * csr.node_bound + csr.edge_v[ids]
+        order = np.argsort(keys)
+        self.keys = keys[order]
+        self.ids = ids[order]
+
+    def scores(self, result):
+        """Edge-id indexed float32 scores of a result: an array already indexed by edge id,
+        a {(u, v): score} dict or (u, v, score) rows. Edges missing from the result score 0."""
+        if isinstance(result, np.ndarray):
+            return result.astype(np.float32)
+        if isinstance(result, dict):
+            result = [(u, v, score) for (u, v), score in result.items()]
+        scores = np.zeros(self.csr.edge_bound, dtype=np.float32)
+        if len(result) == 0:
+            return scores
+        u, v, values = (np.asarray(column) for column in zip(*result))
+        u, v = u.astype(np.int64), v.astype(np.int64)
+        keys = np.minimum(u, v) * self.csr.node_bound + np.maximum(u, v)
+        scores[self.ids[np.searchsorted(self.keys, keys)]] = values
+        return scores
+
+
+class ComparisonResult:
+    """Pairwise rank agreement of every run of every algorithm.
+
+    Run i of the stacked order is repetition i % repetitions of algorithm
+    names[i // repetitions]; each measure is an (A·R × A·R) matrix over those runs.
+    """
+    names: list
+    repetitions: int
+    matrices: dict
+
+    def __init__(self, names: list, repetitions: int, matrices: dict):
+        self.names = names
+        self.repetitions = repetitions
+        self.matrices = matrices
+
+    def labels(self):
+        return [f"{name} {repetition + 1}" for name in self.names for repetition in range(self.repetitions)]
+
+    def block(self, measure: str, name_a: str, name_b: str):
+        r = self.repetitions
+        a, b = self.names.index(name_a) * r, self.names.index(name_b) * r
+        values = self.matrices[measure][a:a + r, b:b + r]
+        # Within an algorithm a run is not compared with itself
+        return values[~np.eye(r, dtype=bool)] if name_a == name_b else values.ravel()
+
+    def summary(self, measure: str):
+        """(mean, std) of measure for every pair of algorithms, in registry order.
+
+        The (a, a) entries are the stability of algorithm a across its own repetitions.
+        """
+        summary = {}
+        for i, name_a in enumerate(self.names):
+            for name_b in self.names[i:]:
+                values = self.block(measure, name_a, name_b)
+                summary[(name_a, name_b)] = (float(np.mean(values)), float(np.std(values))) if len(values) else (0.0, 0.0)
+        return summary
+
+
+def collect_scores(G: Graph, algorithms: dict, repetitions: int, directory: str = None,
+                   memory_limit: int = DEFAULT_MEMORY_LIMIT, on_run=None):
+    """Run every algorithm of the registry repetitions times into one (R × m) float32 matrix each.
+
+    algorithms maps a name to a function G -> result, where the result is anything
+    EdgeIndex.scores accepts. Each result is turned into edge-id indexed scores as soon as it
+    is returned and dropped, so only the matrices grow with R; a matrix above memory_limit bytes
+    is memory-mapped to <directory>/<name>_scores.npy. on_run(index, name, repetition, scores) is
+    called after every run.
+    """
+    index = EdgeIndex(csr_from_networkit(G))
+    matrices = {}
+    for name, algorithm in algorithms.items():
+        path = None if directory is None else os.path.join(directory, f"{name}_scores.npy")
+        matrix = new_matrix((repetitions, index.csr.edge_bound), np.float32, path, memory_limit)
+        for repetition in range(repetitions):
+            matrix[repetition] = index.scores(algorithm(G))
+            if on_run is not None:
+                on_run(index, name, repetition, matrix[repetition])
+        matrices[name] = matrix
+    return index, matrices
+
+
+def compare_matrices(matrices: dict, valid: np.ndarray = None, k: int = DEFAULT_TOP_K,
+                     directory: str = None, memory_limit: int = DEFAULT_MEMORY_LIMIT,
+                     batch_bytes: int = DEFAULT_BATCH_BYTES):
+    """Mean rank displacement, Spearman rho and top-k overlap between all the stacked runs.
+
+    Each run is ranked once; the three (N × N) matrices are then accumulated over batches of
+    edge columns, so a pass costs O(N² m) arithmetic in numpy calls but only
+    batch_bytes of pairwise differences at a time, however many algorithms there are. valid
+    selects the edge ids to compare (all of them by default). Kendall tau has no such
+    batched form and is left to rank_metrics for single pairs.
+    """
+    names = list(matrices)
+    repetitions = len(next(iter(matrices.values())))
+    runs = len(names) * repetitions
+    if valid is None:
+        valid = np.arange(matrices[names[0]].shape[1])
+    m = len(valid)
+    k = min(k, m)
+
+    def derived(dtype, suffix):
+        path = None if directory is None else os.path.join(directory, f"comparison_{suffix}.npy")
+        return new_matrix((runs, m), dtype, path, memory_limit)
+
+    ranks, normalized, top = derived(np.int32, "ranks"), derived(np.float64, "spearman"), derived(bool, "top_k")
+    for row, (name, repetition) in enumerate((name, repetition) for name in names for repetition in range(repetitions)):
+        scores = np.asarray(matrices[name][repetition])[valid]
+        ranks[row] = rank_array(scores)
+        centered = average_ranks(scores) - (m - 1) / 2
+        norm = np.linalg.norm(centered)
+        # A constant score row ranks all edges alike: it agrees with itself and with nothing else
+        normalized[row] = centered / norm if norm > 0 else 0
+        top[row, top_k_edges(scores, k)] = True
+
+    displacement = np.zeros((runs, runs))
+    spearman = np.zeros((runs, runs))
+    overlap = np.zeros((runs, runs))
+    width = max(1, batch_bytes // (runs * runs * 8))
+    for start in range(0, m, width):
+        chunk = ranks[:, start:start + width].astype(np.int64)
+        displacement += np.abs(chunk[:, None, :] - chunk[None, :, :]).sum(axis=2)
+        chunk = normalized[:, start:start + width]
+        spearman += chunk @ chunk.T
+        chunk = top[:, start:start + width].astype(np.float64)
+        overlap += chunk @ chunk.T
+
+    np.fill_diagonal(spearman, 1.0)
+    return ComparisonResult(names, repetitions, dict(displacement=displacement / max(m, 1), spearman=spearman,
+                                                     top_k_overlap=overlap / k if k else np.ones((runs, runs))))
+
+
+def run_comparison(G: Graph, algorithms: dict, repetitions: int, directory: str = None, k: int = DEFAULT_TOP_K,
+                   memory_limit: int = DEFAULT_MEMORY_LIMIT, on_run=None):
+    # collect_scores then compare_matrices over the edge ids in use
+    index, matrices = collect_scores(G, algorithms, repetitions, directory, memory_limit, on_run)
+    return compare_matrices(matrices, np.flatnonzero(index.csr.edge_u >= 0), k, directory, memory_limit)
@@ -0,0 +1,47 @@
+import math
+from rank_metrics import kendall_tau, top_k_overlap
+
+
+DEFAULT_CHECKPOINTS = 20  # Checkpoints over rho walks when no checkpoint size is given
+DEFAULT_STABILITY_TOP_K = 100  # Top edges compared between checkpoints
+
+
+
+def ranking_stable(previous, current, tolerance: float, top_k: int = DEFAULT_STABILITY_TOP_K):
+    # Both the top-k overlap and Kendall tau between two checkpoints must be within tolerance of 1
+    if top_k_overlap(previous, current, top_k) < 1.0 - tolerance:
+        return False
+    return kendall_tau(previous, current) >= 1.0 - tolerance
+
+
+def default_checkpoint(rho: int, multiple: int = 1):
+    # rho / DEFAULT_CHECKPOINTS rounded up to a multiple of the walker chunk size
+    checkpoint = math.ceil(rho / DEFAULT_CHECKPOINTS)
+    return math.ceil(checkpoint / multiple) * multiple
+
+
+def advance_in_chunks(walker, max_walks: int, chunk: int):
+    # Advance walker by chunk walks at a time up to max_walks, yielding the walks run so far
+    walks = 0
+    while walks < max_walks:
+        step = min(chunk, max_walks - walks)
+        walker.advance(step)
+        walks += step
+        yield walks
+
+
+def run_until_stable(walker, max_walks: int, checkpoint: int, tolerance: float,
+                     top_k: int = DEFAULT_STABILITY_TOP_K):
+    """Advance walker by checkpoint walks at a time until its ranking stops moving.
+
+    walker needs ``advance(walks)`` and ``scores()``; scores of consecutive checkpoints are
+    compared with ranking_stable. Returns the number of walks actually run, at most max_walks.
+    """
+    walks = 0
+    previous = None
+    for walks in advance_in_chunks(walker, max_walks, checkpoint):
+        current = walker.scores().copy()
+        if previous is not None and ranking_stable(previous, current, tolerance, top_k):
+            break
+        previous = current
+    return walks
@@ -1,13 +1,26 @@
 import os
+import time
+import statistics
 from datetime import datetime
+import numpy as np
 import networkit as nk
 from tests.werw_test import werw_centrality_algorithm
+from werw_kpath_final import werw_centrality_algorithm as werw_final_algorithm
 from erw_kpath_final import erw_centrality_algorithm
+from graph_loader import load_graph
+from comparison_matrix import MEASURES, EdgeIndex, run_comparison
+from result_cache import ResultCache
+from csr_graph import csr_from_networkit
+from sampled_betweenness import sample_edge_betweenness
 import csv
 import pandas as pd
 import matplotlib.pyplot as plt
 
 
+DEFAULT_GRAPH = "../graph/graph(n=10, m=30).txt"
+DEFAULT_EBC_TIME_BUDGET = 10.0  # Seconds of sampled EBC when no walk run has been timed yet
+
+
 
 def get_file_name(base_name, extension, directory, index):
     return os.path.join(directory, f"{base_name}_{index}.{extension}")
@@ -23,63 +36,106 @@ def read_results(filename):
     return results
 
 
-def werw_results(G, output_file):
-    results = werw_centrality_algorithm(G)
-    edge_centralities = {(u, v): centrality for u, v, centrality in results}
-    save_results(G, edge_centralities, output_file)
-    return edge_centralities
-
-
-def erw_results(G, output_file):
-    results = erw_centrality_algorithm(G)
-    edge_centralities = {(u, v): centrality for u, v, centrality in results}
-    save_results(G, edge_centralities, output_file)
-    return edge_centralities
-
-
-def edge_betweenness_results(G, output_file):
+def edge_betweenness_scores(G):
+    # Exact EBC, indexed by networkit edge id
     G.indexEdges()
     betweenness = nk.centrality.Betweenness(G, computeEdgeCentrality=True)
     betweenness.run()
-    edge_scores = betweenness.edgeScores()
-
-    edge_centralities = {}
-    for u, v in G.iterEdges():
-        edge_id = G.edgeId(u, v)
-        edge_centralities[(u, v)] = edge_scores[edge_id]
-
-    save_results(G, edge_centralities, output_file)
-    return edge_centralities
+    return np.asarray(betweenness.edgeScores())
+
+
+class SampledEbc:
+    """Registry entry estimating EBC from sampled sources, for graphs where exact EBC is out of reach.
+
+    Each run searches samples sources, or as many as fit in time_budget seconds; with neither,
+    the budget is the mean wall-clock time of the walk runs recorded in walk_seconds so far.
+    Every estimate is kept in runs for its error bars.
+    """
+    samples: int
+    time_budget: float
+    seed: int
+    walk_seconds: list
+    runs: list
+
+    def __init__(self, samples=None, time_budget=None, seed=None, walk_seconds=None):
+        self.samples = samples
+        self.time_budget = time_budget
+        self.seed = seed
+        self.walk_seconds = walk_seconds if walk_seconds is not None else []
+        self.runs = []
+
+    def __call__(self, G):
+        time_budget = self.time_budget
+        if self.samples is None and time_budget is None:
+            time_budget = statistics.fmean(self.walk_seconds) if self.walk_seconds else DEFAULT_EBC_TIME_BUDGET
+        seed = None if self.seed is None else self.seed + len(self.runs)
+        estimate = sample_edge_betweenness(csr_from_networkit(G), self.samples, time_budget, seed)
+        self.runs.append(estimate)
+        return estimate.scores
+
+
+def timed(algorithm, seconds: list):
+    # algorithm with the wall-clock time of every call appended to seconds
+    def run(G, **params):
+        start = time.perf_counter()
+        result = algorithm(G, **params)
+        seconds.append(time.perf_counter() - start)
+        return result
+    return run
+
+
+def build_algorithms(seed=None, cache=None, ebc_mode="exact", ebc_samples=None, ebc_time_budget=None):
+    # Exact EBC is computed once per graph and reused from the cache; with a seed, the ERW and WERW
+    # repetitions are reproducible (WERW then runs werw_kpath_final) and cached as well.
+    # ebc_mode="sampled" replaces exact EBC with SampledEbc, budgeted on the walk runs by default
+    cache = cache or ResultCache()
+    walk_seconds = []
+    werw, erw = timed(werw_centrality_algorithm, walk_seconds), timed(erw_centrality_algorithm, walk_seconds)
+    if seed is None:
+        algorithms = {"WERW": werw, "ERW": erw}
+    else:
+        algorithms = {"WERW": cache.seeded("WERW", timed(werw_final_algorithm, walk_seconds), seed),
+                      "ERW": cache.seeded("ERW", erw, seed)}
+    if ebc_mode == "exact":
+        algorithms["EBC"] = cache.deterministic("EBC", edge_betweenness_scores)
+    elif ebc_mode == "sampled":
+        algorithms["EBC"] = SampledEbc(ebc_samples, ebc_time_budget, seed, walk_seconds)
+    else:
+        raise ValueError(f"unknown EBC mode: {ebc_mode}")
+    return algorithms
+
+
+def save_sampling(algorithms, G, output_directory):
+    # Sample sizes and error bars of every sampled EBC run; per-edge standard errors go next to the scores
+    sampled = {name: algorithm for name, algorithm in algorithms.items() if isinstance(algorithm, SampledEbc)}
+    if not sampled:
+        return
+    index = EdgeIndex(csr_from_networkit(G))
+    with open(os.path.join(output_directory, "ebc_sampling.csv"), 'w', newline='') as csvfile:
+        csvwriter = csv.writer(csvfile)
+        csvwriter.writerow(['Run', 'Samples', 'Nodes', 'Seconds', 'Relative standard error (top-k)'])
+        for name, algorithm in sampled.items():
+            for repetition, estimate in enumerate(algorithm.runs):
+                save_scores(index, estimate.standard_errors,
+                            get_file_name(f"{name.lower()}_errors", "txt", output_directory, repetition + 1))
+                csvwriter.writerow([f"{name} {repetition + 1}", estimate.samples, estimate.nodes, estimate.seconds,
+                                    estimate.relative_error()])
+                print(f"{name} test {repetition + 1}: {estimate.samples}/{estimate.nodes} sources, "
+                      f"relative standard error {estimate.relative_error()}")
+
+
+def save_scores(index, scores, output_file):
+    with open(output_file, 'w') as f:
+        for edge_id in index.ids:
+            f.write(f"{index.csr.edge_u[edge_id]} {index.csr.edge_v[edge_id]} {scores[edge_id]}\n")
 
 
-def save_results(G, edge_centralities, output_file):
-    with open(output_file, 'w') as f:
-        for u, v in G.iterEdges():
-            centrality = edge_centralities.get((u, v), edge_centralities.get((v, u), 0))
-            f.write(f"{u} {v} {centrality}\n")
-
-
-def calculate_edge_distances(results1, results2):
-    edges = sorted(set(results1.keys()) | set(results2.keys()))
-    distances = []
-    for i, edge in enumerate(edges):
-        pos1 = i
-        pos2 = i
-        if edge in results1:
-            pos1 = list(results1.keys()).index(edge)
-        if edge in results2:
-            pos2 = list(results2.keys()).index(edge)
-        distance = abs(pos1 - pos2)
-        distances.append((*edge, distance))
-    return distances
-
-
-def calculate_average_distance(distances):
-    if len(distances) == 0:
-        return 0
-    total_distance = sum(distance for _, _, distance in distances)
-    average_distance = total_distance / len(distances)
-    return average_distance
+def save_matrix(comparison, measure, output_file):
+    with open(output_file, 'w', newline='') as csvfile:
+        csvwriter = csv.writer(csvfile)
+        csvwriter.writerow(['Run', *comparison.labels()])
+        for label, row in zip(comparison.labels(), comparison.matrices[measure]):
+            csvwriter.writerow([label, *row])
 
 
 def save_overall_average_distance(alg1, alg2, overall_average_distance, output_filename):
@@ -88,72 +144,42 @@ def save_overall_average_distance(alg1, alg2, overall_average_distance, output_f
         f.write(f"Total average distance: {overall_average_distance}\n")
 
 
-def run_full_test(test_number, directory):
+def run_full_test(test_number, directory, algorithms=None, seed=None, graph_path=DEFAULT_GRAPH, ebc_mode="exact",
+                  ebc_samples=None, ebc_time_budget=None):
+    # Every algorithm of the registry runs test_number times; all the runs are compared with each other at once.
+    # The std columns are the error bars over the repetitions
+    algorithms = algorithms or build_algorithms(seed, None, ebc_mode, ebc_samples, ebc_time_budget)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_directory = os.path.join(directory, f"test_results_{timestamp}_k=20")
     os.makedirs(output_directory, exist_ok=True)
 
-    reader = nk.graphio.EdgeListReader(separator=" ", firstNode=0, continuous=False, directed=False)
-    G = reader.read("../graph/graph(n=10, m=30).txt")
+    G = load_graph(graph_path)
 
-    total_average_distances = {
-        "werw_erw": 0,
-        "werw_ebc": 0,
-        "erw_ebc": 0
-    }
+    def save_run(index, name, repetition, scores):
+        save_scores(index, scores, get_file_name(f"{name.lower()}_results", "txt", output_directory, repetition + 1))
+        print(f"{name} test {repetition + 1} completed.")
 
-    csv_output_file = os.path.join(output_directory, "distance_results.csv")
+    comparison = run_comparison(G, algorithms, test_number, output_directory, on_run=save_run)
 
+    csv_output_file = os.path.join(output_directory, "distance_results.csv")
+    summaries = {measure: comparison.summary(measure) for measure in MEASURES}
     with open(csv_output_file, 'w', newline='') as csvfile:
         csvwriter = csv.writer(csvfile)
-        csvwriter.writerow(['Test', 'WERW-ERW', 'WERW-EBC', 'ERW-EBC'])
-
-    for i in range(1, test_number + 1):
-        erw_output_file = get_file_name("erw_results", "txt", output_directory, i)
-        werw_output_file = get_file_name("werw_results", "txt", output_directory, i)
-        ebc_output_file = get_file_name("ebc_results", "txt", output_directory, i)
-
-        werw_res = werw_results(G, werw_output_file)
-        erw_res = erw_results(G, erw_output_file)
-        ebc_res = edge_betweenness_results(G, ebc_output_file)
-
-        distances_werw_erw = calculate_edge_distances(werw_res, erw_res)
-        distances_werw_ebc = calculate_edge_distances(werw_res, ebc_res)
-        distances_erw_ebc = calculate_edge_distances(erw_res, ebc_res)
-
-        average_distance_werw_erw = calculate_average_distance(distances_werw_erw)
-        average_distance_werw_ebc = calculate_average_distance(distances_werw_ebc)
-        average_distance_erw_ebc = calculate_average_distance(distances_erw_ebc)
+        csvwriter.writerow(['Comparison', 'Distance', 'Distance std', 'Spearman', 'Spearman std',
+                            'Top-k overlap', 'Top-k overlap std'])
+        for name_a, name_b in summaries["displacement"]:
+            csvwriter.writerow([f"{name_a}-{name_b}",
+                                *(value for measure in MEASURES for value in summaries[measure][(name_a, name_b)])])
 
-        total_average_distances["werw_erw"] += average_distance_werw_erw
-        total_average_distances["werw_ebc"] += average_distance_werw_ebc
-        total_average_distances["erw_ebc"] += average_distance_erw_ebc
-
-        print(
-            f"Test {i} completed. Average distances: WERW-ERW: {average_distance_werw_erw}, WERW-EBC: {average_distance_werw_ebc}, ERW-EBC: {average_distance_erw_ebc}")
-
-        with open(csv_output_file, 'a', newline='') as csvfile:
-            csvwriter = csv.writer(csvfile)
-            csvwriter.writerow(
-                [f"Test {i}", average_distance_werw_erw, average_distance_werw_ebc, average_distance_erw_ebc])
-
-    overall_average_distances = {
-        comparison: total / test_number
-        for comparison, total in total_average_distances.items()
-    }
-
-    with open(csv_output_file, 'a', newline='') as csvfile:
-        csvwriter = csv.writer(csvfile)
-        csvwriter.writerow([])
-        csvwriter.writerow(['Overall Average',
-                            overall_average_distances["werw_erw"],
-                            overall_average_distances["werw_ebc"],
-                            overall_average_distances["erw_ebc"]])
+    for measure in MEASURES:
+        save_matrix(comparison, measure, os.path.join(output_directory, f"{measure}_matrix.csv"))
+    save_sampling(algorithms, G, output_directory)
 
-    show_csv_as_table(csv_output_file, "Test results: k=20, n=10, m=30", output_directory)
+    show_csv_as_table(csv_output_file, f"Test results: k=20, n={G.numberOfNodes()}, m={G.numberOfEdges()}",
+                      output_directory)
 
-    print(
-        f"Overall average distances: WERW-ERW: {overall_average_distances['werw_erw']}, WERW-EBC: {overall_average_distances['werw_ebc']}, ERW-EBC: {overall_average_distances['erw_ebc']}")
+    print("Overall average distances: " + ", ".join(
+        f"{name_a}-{name_b}: {mean} ± {std}" for (name_a, name_b), (mean, std) in summaries["displacement"].items()))
 
 
 def show_csv_as_table(csv_file, title, save_directory):
@@ -175,4 +201,6 @@ def show_csv_as_table(csv_file, title, save_directory):
 if __name__ == "__main__":
     number_of_tests = 10
     output_directory = os.path.abspath("results")
-    run_full_test(number_of_tests, output_directory)
\ No newline at end of file
+    # "sampled" estimates EBC within the time of a walk run, for graphs such as the Albert series
+    ebc_mode = "exact"
+    run_full_test(number_of_tests, output_directory, ebc_mode=ebc_mode)
\ No newline at end of file
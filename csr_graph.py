@@ -0,0 +1,89 @@
+import numpy as np
+from networkit import Graph
+
+
+
+class CsrGraph:
+    """Immutable array form of an undirected networkit graph.
+
+    Row ``u`` of the adjacency is ``neighbors[offsets[u]:offsets[u + 1]]``, sorted by
+    neighbor id, and ``edge_ids`` holds the networkit edge id of every entry. ``edge_u``
+    and ``edge_v`` give the ``(min, max)`` endpoints of each edge id, so that an
+    edge-id indexed score array can be turned back into the usual ``(u, v, weight)`` rows.
+    """
+    offsets: np.ndarray
+    neighbors: np.ndarray
+    edge_ids: np.ndarray
+    edge_u: np.ndarray
+    edge_v: np.ndarray
+    nodes: np.ndarray
+
+    def __init__(self, offsets, neighbors, edge_ids, edge_u, edge_v, nodes):
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self.edge_ids = edge_ids
+        self.edge_u = edge_u
+        self.edge_v = edge_v
+        self.nodes = nodes
+
+    @property
+    def number_of_nodes(self):
+        return len(self.nodes)
+
+    @property
+    def number_of_edges(self):
+        return int(np.count_nonzero(self.edge_u >= 0))
+
+    @property
+    def node_bound(self):
+        return len(self.offsets) - 1
+
+    @property
+    def edge_bound(self):
+        return len(self.edge_u)
+
+    def degrees(self):
+        return np.diff(self.offsets)
+
+
+def csr_from_edges(edge_u, edge_v, node_bound, nodes=None):
+    """Build a CsrGraph from endpoint arrays indexed by edge id (-1 marks a free id)."""
+    edge_u = np.asarray(edge_u, dtype=np.int64)
+    edge_v = np.asarray(edge_v, dtype=np.int64)
+    low = np.minimum(edge_u, edge_v)
+    high = np.maximum(edge_u, edge_v)
+
+    ids = np.flatnonzero(low >= 0)
+    # Every undirected edge appears once in the row of each endpoint; a self-loop, like in networkit,
+    # appears once in its own row
+    mirrored = ids[low[ids] != high[ids]]
+    source = np.concatenate((low[ids], high[mirrored]))
+    target = np.concatenate((high[ids], low[mirrored]))
+    entry_ids = np.concatenate((ids, mirrored))
+
+    order = np.lexsort((target, source))
+    neighbors = target[order]
+    edge_ids = entry_ids[order]
+
+    offsets = np.zeros(node_bound + 1, dtype=np.int64)
+    np.cumsum(np.bincount(source, minlength=node_bound), out=offsets[1:])
+
+    if nodes is None:
+        nodes = np.arange(node_bound, dtype=np.int64)
+
+    return CsrGraph(offsets, neighbors, edge_ids, low, high, np.asarray(nodes, dtype=np.int64))
+
+
+def csr_from_networkit(G: Graph):
+    G.indexEdges()
+    edge_u = np.full(G.upperEdgeIdBound(), -1, dtype=np.int64)
+    edge_v = np.full(G.upperEdgeIdBound(), -1, dtype=np.int64)
+
+    def store_edge(u, v, weight, edge_id):
+        edge_u[edge_id] = u
+        edge_v[edge_id] = v
+
+    G.forEdges(store_edge)
+    nodes = np.fromiter(G.iterNodes(), dtype=np.int64, count=G.numberOfNodes())
+
+    return csr_from_edges(edge_u, edge_v, G.upperNodeIdBound(), nodes)
@@ -1,13 +1,28 @@
 import os
+import sys
 import json
 import time
-import networkit as nk
+import warnings
+import statistics
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
 import matplotlib.pyplot as plt
-from tests.werw_test import werw_centrality_algorithm
+from werw_kpath_final import werw_centrality_algorithm
 from erw_kpath_final import erw_centrality_algorithm
+from graph_loader import load_graph
+from timing_harness import measure, summarize, fit_power_law
+from memory_usage import reset_peak_rss, peak_rss_bytes, TracedPeak
+from profiler import profiler
+from experiment_scheduler import ScheduledJob, run_jobs, write_record, STATUS_OK
 from tabulate import tabulate  # Assicurati di installare questa libreria con pip install tabulate
 
 
+ALGORITHMS = {
+    "WERW": werw_centrality_algorithm,
+    "ERW": erw_centrality_algorithm
+}
+
+
 def load_config(config_file_name="doubling_experiment/doubling_experiment_config.json"):
     with open(config_file_name, 'r') as file:
         config = json.load(file)
@@ -25,7 +40,8 @@ def filter_graph_files(config, keyword=""):
             continue
         for file in os.listdir(subfolder_path):
             file_path = os.path.join(subfolder_path, file)
-            result.append(file_path)
+            if os.path.isfile(file_path):  # Skips the .npcache directories of graph_loader
+                result.append(file_path)
 
     return result
 
@@ -34,57 +50,239 @@ def create_log_directory(config):
     os.makedirs(log_dir, exist_ok=True)
     return log_dir
 
-def run_test(config):
+def load_timed(file):
+    # Graph, load seconds and peak bytes allocated by the load (0 unless tracemalloc is tracing)
+    with TracedPeak() as traced:
+        start_time = time.perf_counter()
+        graph = load_graph(file)
+        load_time = time.perf_counter() - start_time
+    return graph, load_time, traced.peak
+
+def new_memory_results(algorithms):
+    # Peak RSS bytes of every timed run, largest tracemalloc peak per engine phase, load peaks by file
+    return dict(rss={alg: {} for alg in algorithms}, phases={alg: {} for alg in algorithms}, load={})
+
+def start_memory_tracing(config):
+    # Per-phase allocation peaks come from the profiler phases while tracemalloc is tracing
+    if config.get("memory", {}).get("tracemalloc"):
+        tracemalloc.start()
+        profiler.enable()
+
+def measures_rss(config):
+    return config.get("memory", {}).get("peak_rss", True)
+
+def start_run(rss=True):
+    if rss:
+        reset_peak_rss()
+    profiler.reset()
+
+def measure_file(config, graph, file, load_time, algorithms, log_dir, results, edge_counts, memory, settle=None):
+    # Warm-up and timed repetitions of every algorithm on one loaded graph; settle() is called
+    # before every timed run, so a background load started earlier overlaps the warm-up only
     repetition = config["repetition"]
-    log_dir = create_log_directory(config)
-
-    algorithms = {
-        "WERW": werw_centrality_algorithm,
-        "ERW": erw_centrality_algorithm
-    }
+    warmup = config.get("warmup", 1)  # Untimed runs per algorithm before the timed ones
+    top_k = config.get("top_k")  # None keeps the full ranking
+    timing = config.get("timing", {})
+    rss_enabled = measures_rss(config)
+
+    def before_run():
+        if settle is not None:
+            settle()
+        start_run(rss_enabled)
+
+    print(f"\n{'=' * 50}")
+    print(f"Esecuzione su file: {file}")
+    print(f"Tempo di caricamento: {load_time:.3f} secondi")
+    print(f"{'=' * 50}")
+
+    for alg_name, algorithm in algorithms.items():
+        print(f"\n{'-' * 30}")
+        print(f"Algoritmo: {alg_name}")
+        print(f"{'-' * 30}")
+
+        alg_log_dir = os.path.join(log_dir, alg_name, os.path.basename(file).split('.')[0])
+        os.makedirs(alg_log_dir, exist_ok=True)
+        times = results[alg_name].setdefault(file, [])
+        edges = edge_counts[alg_name].setdefault(file, [])
+        rss = memory["rss"][alg_name].setdefault(file, [])
+        phase_peaks = memory["phases"][alg_name].setdefault(file, {})
+
+        def log_run(i, execution_time, cpu_time, result):
+            print(f"\nTest {i + 1}")
+            print(f"Tempo di esecuzione: {execution_time:.2f} secondi (CPU {cpu_time:.2f})")
+
+            times.append(execution_time)
+            edges.append(graph.numberOfEdges())
+            if rss_enabled:
+                rss.append(peak_rss_bytes())
+            for phase, peak in profiler.phase_peak_bytes.items():
+                phase_peaks[phase] = max(phase_peaks.get(phase, 0), peak)
+
+            log_file_path = os.path.join(alg_log_dir, f"execution_{i + 1}.log")
+            with open(log_file_path, "w") as log_file:
+                log_file.write(f"Esecuzione {i + 1} per {file} con {alg_name}:\n")
+                log_file.write(f"Tempo di caricamento: {load_time:.3f} secondi\n")
+                log_file.write(f"Tempo di esecuzione: {execution_time:.4f} secondi\n")
+                log_file.write(f"Tempo CPU: {cpu_time:.4f} secondi\n")
+                if rss_enabled:
+                    log_file.write(f"Picco RSS: {rss[-1] / 2 ** 20:.1f} MB\n")
+                log_file.write(f"Risultato: {result}\n")
+
+        # Warm-up runs, then timed repetitions (at least "repetition") until the CI of the mean
+        # is narrow enough or the time budget is spent
+        measure(lambda: algorithm(graph, top_k=top_k), warmup, repetition, on_run=log_run, before_run=before_run,
+                **timing)
 
+def run_test(config):
+    log_dir = create_log_directory(config)
     file_list = filter_graph_files(config)
-    results = {alg: {file: [] for file in file_list} for alg in algorithms}
-    edge_counts = {alg: {file: [] for file in file_list} for alg in algorithms}
-
-    for file in file_list:
-        print(f"\n{'=' * 50}")
-        print(f"Esecuzione su file: {file}")
-        print(f"{'=' * 50}")
-
-        for alg_name, algorithm in algorithms.items():
-            print(f"\n{'-' * 30}")
-            print(f"Algoritmo: {alg_name}")
-            print(f"{'-' * 30}")
+    results = {alg: {} for alg in ALGORITHMS}
+    edge_counts = {alg: {} for alg in ALGORITHMS}
+    load_times = {}
+    memory = new_memory_results(ALGORITHMS)
+    start_memory_tracing(config)
+    prefetch = config.get("prefetch", True)
+    if prefetch and config.get("memory", {}).get("tracemalloc"):
+        # tracemalloc peaks are global: a load on another thread would mix with the warm-up allocations
+        warnings.warn("prefetch disattivato: non è compatibile con tracemalloc")
+        prefetch = False
+    elif prefetch and measures_rss(config):
+        # The next graph stays resident during the timed runs of the current one
+        warnings.warn("prefetch attivo insieme a peak_rss: i picchi RSS includono il grafo successivo; "
+                      "impostare \"prefetch\": false per picchi esatti")
+
+    # Load stage: each graph is loaded once; with prefetch the next file is loaded during the
+    # warm-up of the current one and waited for before its timed runs
+    with ThreadPoolExecutor(max_workers=1) as prefetcher:
+        pending = prefetcher.submit(load_timed, file_list[0]) if file_list else None
+        for index, file in enumerate(file_list):
+            graph, load_times[file], memory["load"][file] = pending.result()
+            if index + 1 < len(file_list) and prefetch:
+                pending = prefetcher.submit(load_timed, file_list[index + 1])
+            measure_file(config, graph, file, load_times[file], ALGORITHMS, log_dir, results, edge_counts, memory,
+                         settle=pending.result if prefetch else None)
+            del graph
+            if index + 1 < len(file_list) and not prefetch:
+                pending = prefetcher.submit(load_timed, file_list[index + 1])
+
+    create_reports(results, edge_counts, load_times, log_dir, memory)
+
+def graph_generator(config_file):
+    # graphs_generators is a folder of scripts that import each other by module name
+    sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "graphs_generators"))
+    from generate import GraphGeneratorFactory
+    return GraphGeneratorFactory(config_file).get_generator()
+
+def run_auto_doubling(config):
+    """Generate and measure ever larger graphs until every algorithm exceeds the time budget.
+
+    The series comes from the generator selected in the GraphGeneratorFactory configuration,
+    one next_graph() at a time; an algorithm whose median time on a graph exceeds
+    config["auto_doubling"]["time_budget"] seconds is not run on the larger ones.
+    """
+    auto_doubling = config["auto_doubling"]
+    generator = graph_generator(auto_doubling.get("generator_config", "graphs_generators/generator_config.json"))
+    log_dir = create_log_directory(config)
+    results = {alg: {} for alg in ALGORITHMS}
+    edge_counts = {alg: {} for alg in ALGORITHMS}
+    load_times = {}
+    memory = new_memory_results(ALGORITHMS)
+    start_memory_tracing(config)
+    active = dict(ALGORITHMS)
+
+    for _ in range(auto_doubling.get("max_graphs", 20)):
+        if not active:
+            break
+        file = generator.next_graph()
+        graph, load_times[file], memory["load"][file] = load_timed(file)
+        measure_file(config, graph, file, load_times[file], active, log_dir, results, edge_counts, memory)
+        del graph
+        for alg_name in list(active):
+            if summarize(results[alg_name][file])["median"] > auto_doubling["time_budget"]:
+                print(f"{alg_name}: budget di {auto_doubling['time_budget']} secondi superato, fermato")
+                del active[alg_name]
+
+    create_reports(results, edge_counts, load_times, log_dir, memory)
+
+def measure_job(record_path, file, alg_name, i, repetition, warmup, top_k, config):
+    # One (file, algorithm, repetition) job of the scheduler, on its own pinned process
+    start_memory_tracing(config)
+    graph, load_time, load_peak = load_timed(file)
+    algorithm = ALGORITHMS[alg_name]
+
+    runs = []
+    measure(lambda: algorithm(graph, top_k=top_k), warmup, 1, 1, on_run=lambda *run: runs.append(run),
+            before_run=lambda: start_run(measures_rss(config)))
+    _, execution_time, _, result = runs[0]
+    peak_rss = peak_rss_bytes() if measures_rss(config) else None
+
+    with open(record_path.replace(".json", ".log"), "w") as log_file:
+        log_file.write(f"Esecuzione {i + 1}/{repetition} per {file} con {alg_name}:\n")
+        log_file.write(f"Esecuzioni di riscaldamento: {warmup}" + (" (esecuzione a freddo)\n" if warmup == 0 else "\n"))
+        log_file.write(f"Tempo di caricamento: {load_time:.3f} secondi\n")
+        log_file.write(f"Tempo di esecuzione: {execution_time:.2f} secondi\n")
+        if peak_rss is not None:
+            log_file.write(f"Picco RSS: {peak_rss / 2 ** 20:.1f} MB\n")
+        log_file.write(f"Risultato: {result}\n")
+    write_record(record_path, dict(status=STATUS_OK, file=file, algorithm=alg_name, repetition=i, warmup=warmup,
+                                   load_time=load_time, execution_time=execution_time,
+                                   edges=graph.numberOfEdges(), peak_rss=peak_rss, load_peak=load_peak,
+                                   phase_peaks=dict(profiler.phase_peak_bytes)))
+
+def run_scheduled(config):
+    """Run the experiment as one pinned process per (file, algorithm, repetition) job.
+
+    config["scheduler"] sets the concurrency, the per-job timeout in seconds and, to resume an
+    interrupted run, the log directory of that run: jobs whose record is already there are skipped.
+    Every job is a fresh process, so a warm-up would be paid again by each repetition:
+    config["scheduler"]["warmup"] (default 0) replaces config["warmup"] here, and with 0 the
+    single timed run of a job is a cold first run.
+    """
+    scheduler = config["scheduler"]
+    repetition = config["repetition"]
+    warmup = scheduler.get("warmup", 0)
+    top_k = config.get("top_k")
+    log_dir = scheduler.get("resume_log_dir") or create_log_directory(config)
 
+    jobs = []
+    for file in filter_graph_files(config):
+        for alg_name in ALGORITHMS:
             alg_log_dir = os.path.join(log_dir, alg_name, os.path.basename(file).split('.')[0])
             os.makedirs(alg_log_dir, exist_ok=True)
-
             for i in range(repetition):
-                print(f"\nTest {i + 1}/{repetition}")
-
-                reader = nk.graphio.EdgeListReader(separator=" ", firstNode=0, continuous=False, directed=False)
-                graph = reader.read(file)
-                start_time = time.time()
-
-                result = algorithm(graph)
-
-                end_time = time.time()
-                execution_time = end_time - start_time
-
-                print(f"Tempo di esecuzione: {execution_time:.2f} secondi")
-
-                results[alg_name][file].append(execution_time)
-                edge_counts[alg_name][file].append(graph.numberOfEdges())
-
-                log_file_path = os.path.join(alg_log_dir, f"execution_{i + 1}.log")
-                with open(log_file_path, "w") as log_file:
-                    log_file.write(f"Esecuzione {i + 1}/{repetition} per {file} con {alg_name}:\n")
-                    log_file.write(f"Tempo di esecuzione: {execution_time:.2f} secondi\n")
-                    log_file.write(f"Risultato: {result}\n")
-
+                record_path = os.path.join(alg_log_dir, f"execution_{i + 1}.json")
+                jobs.append(ScheduledJob(record_path, (file, alg_name, i, repetition, warmup, top_k, config)))
+
+    print(f"Log: {log_dir}, {len(jobs)} job")
+    records = run_jobs(jobs, measure_job, scheduler["concurrency"], scheduler.get("timeout"))
+
+    results = {alg: {} for alg in ALGORITHMS}
+    edge_counts = {alg: {} for alg in ALGORITHMS}
+    load_times = {}
+    memory = new_memory_results(ALGORITHMS)
+    for job, record in zip(jobs, records):
+        if record["status"] != STATUS_OK:
+            print(f"Job {job.record_path}: {record['status']}")
+            continue
+        results[record["algorithm"]].setdefault(record["file"], []).append(record["execution_time"])
+        edge_counts[record["algorithm"]].setdefault(record["file"], []).append(record["edges"])
+        load_times.setdefault(record["file"], []).append(record["load_time"])
+        rss = memory["rss"][record["algorithm"]].setdefault(record["file"], [])
+        if record["peak_rss"] is not None:
+            rss.append(record["peak_rss"])
+        phase_peaks = memory["phases"][record["algorithm"]].setdefault(record["file"], {})
+        for phase, peak in record["phase_peaks"].items():
+            phase_peaks[phase] = max(phase_peaks.get(phase, 0), peak)
+        memory["load"][record["file"]] = max(memory["load"].get(record["file"], 0), record["load_peak"])
+    load_times = {file: sum(times) / len(times) for file, times in load_times.items()}
+
+    create_reports(results, edge_counts, load_times, log_dir, memory)
+
+def create_reports(results, edge_counts, load_times, log_dir, memory):
     create_execution_time_graphs(results, edge_counts, log_dir)
-    create_results_table(results, edge_counts, log_dir)
+    create_memory_graphs(memory, edge_counts, log_dir)
+    create_results_table(results, edge_counts, load_times, log_dir, memory)
+    create_scaling_report(results, edge_counts, log_dir)
 
 def create_execution_time_graphs(results, edge_counts, log_dir):
     plt.figure(figsize=(12, 6))
@@ -98,6 +296,8 @@ def create_execution_time_graphs(results, edge_counts, log_dir):
             data_points.append((avg_edge_count, avg_execution_time))
 
         data_points.sort(key=lambda x: x[0])
+        if not data_points:
+            continue
 
         x_data, y_data = zip(*data_points)
 
@@ -114,15 +314,48 @@ def create_execution_time_graphs(results, edge_counts, log_dir):
     plt.savefig(graph_path)
     plt.close()
 
-def create_results_table(results, edge_counts, log_dir):
+def create_memory_graphs(memory, edge_counts, log_dir):
+    plt.figure(figsize=(12, 6))
+
+    for alg_name, rss_by_file in memory["rss"].items():
+        data_points = sorted((edge_counts[alg_name][file][0], statistics.median(rss) / 2 ** 20)
+                             for file, rss in rss_by_file.items() if rss)
+        if not data_points:
+            continue
+        x_data, y_data = zip(*data_points)
+        plt.scatter(x_data, y_data, label=alg_name)
+        plt.plot(x_data, y_data, marker='o')
+
+    plt.title('Picco di memoria (RSS) in base al numero di archi')
+    plt.xlabel('Numero di archi')
+    plt.ylabel('Picco RSS (MB)')
+    plt.legend()
+    plt.grid(True)
+
+    plt.savefig(os.path.join(log_dir, "memory_vs_edges.png"))
+    plt.close()
+
+def format_phase_peaks(load_peak, phase_peaks):
+    # "graph_load=1.2 weight_init=3.4 ..." in MB, empty when tracemalloc was off
+    peaks = dict(graph_load=load_peak, **phase_peaks)
+    return " ".join(f"{phase}={peak / 2 ** 20:.1f}" for phase, peak in peaks.items() if peak)
+
+def create_results_table(results, edge_counts, load_times, log_dir, memory):
     table_data = []
     for alg_name in results.keys():
         for file in results[alg_name].keys():
-            avg_execution_time = sum(results[alg_name][file]) / len(results[alg_name][file])
+            stats = summarize(results[alg_name][file])
             avg_edge_count = edge_counts[alg_name][file][0]
-            table_data.append([alg_name, os.path.basename(file), avg_edge_count, f"{avg_execution_time:.2f}"])
-
-    headers = ["Algoritmo", "Grafo", "Numero di archi", "Tempo medio di esecuzione (s)"]
+            rss = memory["rss"][alg_name].get(file)
+            table_data.append([alg_name, os.path.basename(file), avg_edge_count, f"{load_times[file]:.3f}",
+                               f"{stats['median']:.3f}", f"{stats['iqr']:.3f}",
+                               f"[{stats['ci_low']:.3f}, {stats['ci_high']:.3f}]", stats["repetitions"],
+                               f"{statistics.median(rss) / 2 ** 20:.1f}" if rss else "-",
+                               format_phase_peaks(memory["load"].get(file, 0),
+                                                  memory["phases"][alg_name].get(file, {})) or "-"])
+
+    headers = ["Algoritmo", "Grafo", "Numero di archi", "Tempo di caricamento (s)", "Mediana di calcolo (s)",
+               "IQR (s)", "IC 95% media (s)", "Ripetizioni", "Picco RSS (MB)", "Picchi tracemalloc per fase (MB)"]
     table = tabulate(table_data, headers=headers, tablefmt="grid")
 
     table_path = os.path.join(log_dir, "results_table.txt")
@@ -132,6 +365,52 @@ def create_results_table(results, edge_counts, log_dir):
     print("\nTabella dei risultati:")
     print(table)
 
+def scaling_points(results, edge_counts, alg_name):
+    # (edges, median time) of every graph an algorithm ran on, by increasing size
+    return sorted((edge_counts[alg_name][file][0], summarize(times)["median"])
+                  for file, times in results[alg_name].items() if times)
+
+def create_scaling_report(results, edge_counts, log_dir):
+    # Empirical exponent b of time ~ c * m^b per algorithm, from a log-log least squares fit
+    table_data = []
+    plt.figure(figsize=(12, 6))
+    for alg_name in results.keys():
+        points = scaling_points(results, edge_counts, alg_name)
+        if len(points) < 2:
+            continue
+        sizes, times = zip(*points)
+        fit = fit_power_law(sizes, times)
+        table_data.append([alg_name, f"{fit['exponent']:.3f}", f"[{fit['low']:.3f}, {fit['high']:.3f}]", len(points)])
+
+        plt.scatter(sizes, times, label=alg_name)
+        plt.plot(sizes, [fit["constant"] * size ** fit["exponent"] for size in sizes],
+                 label=f"{alg_name}: m^{fit['exponent']:.2f}")
+
+    plt.xscale("log")
+    plt.yscale("log")
+    plt.title('Tempo di esecuzione in base al numero di archi (scala log-log)')
+    plt.xlabel('Numero di archi')
+    plt.ylabel('Tempo di esecuzione (secondi)')
+    plt.legend()
+    plt.grid(True)
+    plt.savefig(os.path.join(log_dir, "execution_time_loglog.png"))
+    plt.close()
+
+    headers = ["Algoritmo", "Esponente", "IC 95% esponente", "Grafi"]
+    table = tabulate(table_data, headers=headers, tablefmt="grid")
+    with open(os.path.join(log_dir, "scaling_fit.txt"), "w") as f:
+        f.write(table)
+
+    print("\nEsponente di scala (tempo ~ m^b):")
+    print(table)
+
 if __name__ == "__main__":
     configurazione = load_config()
-    run_test(configurazione)
\ No newline at end of file
+    # With an auto-doubling time budget the graphs are generated on the fly; with a scheduler
+    # concurrency the jobs run on pinned processes; otherwise the graph files run in this process
+    if configurazione.get("auto_doubling", {}).get("time_budget"):
+        run_auto_doubling(configurazione)
+    elif configurazione.get("scheduler", {}).get("concurrency"):
+        run_scheduled(configurazione)
+    else:
+        run_test(configurazione)
\ No newline at end of file
@@ -0,0 +1,273 @@
+import math
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+import numpy as np
+from csr_graph import CsrGraph
+from shared_csr import SharedCsr, attach_csr
+from start_sampler import UniformSampler
+from walk_buffers import WalkBuffers
+from walk_kernels_numba import erw_walk_trace
+from convergence import default_checkpoint, run_until_stable
+
+
+WALK_CHUNK = 8192  # Walks whose random draws are generated together
+DEFAULT_BATCH_SIZE = 4096  # Walkers advanced together by the batch walker
+
+
+
+class ErwWalkCounter:
+    """Integer hop counts per edge id of a growing number of ERW walks.
+
+    The walks are cut into chunks of a fixed size and the i-th chunk always draws from the
+    i-th SeedSequence child of seed, so for a fixed seed the counts after n walks do not
+    depend on how the chunks were spread over workers. Nor do they depend on how the walks
+    were split between advance() calls, as long as every call but the last advances a whole
+    number of chunks (see round_to_chunks): a partial chunk takes a seed of its own.
+    batch_size=None walks one path at a time (in a compiled kernel with use_numba),
+    otherwise batch_size walkers move in lock-step.
+    """
+    walks: int
+    counts: np.ndarray
+
+    def __init__(self, csr: CsrGraph, kappa: int, seed=None, batch_size=None, workers: int = 1,
+                 use_numba: bool = False):
+        self.csr = csr
+        self.kappa = kappa
+        self.batch_size = batch_size
+        self.workers = workers
+        self.use_numba = use_numba
+        self.chunk = WALK_CHUNK if batch_size is None else batch_size
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.walks = 0
+        self.counts = np.zeros(csr.edge_bound, dtype=np.int64)
+        self.pool = None
+
+    def advance(self, walks: int):
+        chunk_sizes = [min(self.chunk, walks - first_walk) for first_walk in range(0, walks, self.chunk)]
+        chunks = list(zip(chunk_sizes, self.seed_sequence.spawn(len(chunk_sizes))))
+        if self.workers <= 1:
+            self.counts += walk_chunks(self.csr, chunks, self.kappa, self.batch_size, use_numba=self.use_numba)
+        else:
+            # One pool and one shared copy of the graph for all the advance() calls
+            if self.pool is None:
+                self.pool = WalkPool(self.csr, self.workers)
+            self.counts[:] = self.pool.walk(chunks, self.kappa, self.batch_size, self.use_numba)
+        self.walks += walks
+
+    def round_to_chunks(self, walks: int):
+        return math.ceil(walks / self.chunk) * self.chunk
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def scores(self):
+        return self.counts
+
+    def omega(self, beta: float):
+        omega = np.full(self.csr.edge_bound, 1.0 / self.csr.number_of_edges)
+        omega += beta * self.counts
+        return omega
+
+
+def ERW_KPath_csr(csr: CsrGraph, kappa: int, rho: int, beta: float, seed=None, batch_size=None, workers: int = 1,
+                  use_numba: bool = False):
+    with ErwWalkCounter(csr, kappa, seed, batch_size, workers, use_numba) as counter:
+        counter.advance(rho)
+        return counter.omega(beta)
+
+
+def ERW_KPath_adaptive(csr: CsrGraph, kappa: int, rho: int, beta: float, tolerance: float, checkpoint=None,
+                       seed=None, batch_size=None, workers: int = 1, use_numba: bool = False):
+    # Stops before rho walks once the ranking is stable between checkpoints; returns (omega, walks used)
+    with ErwWalkCounter(csr, kappa, seed, batch_size, workers, use_numba) as counter:
+        if checkpoint is None:
+            # Whole rounds of chunks, so that every checkpoint keeps all the workers busy
+            checkpoint = default_checkpoint(rho, counter.chunk * max(1, workers))
+        checkpoint = counter.round_to_chunks(checkpoint)
+        walks = run_until_stable(counter, rho, checkpoint, tolerance)
+        return counter.omega(beta), walks
+
+
+class WalkPool:
+    """Worker processes attached to one shared copy of a CSR graph and of its hop counts.
+
+    Graph and accumulator are shared, workers only receive their chunk seeds; both the pool
+    and the segments live until close(), so repeated walk() calls pay for them once.
+    """
+    workers: int
+
+    def __init__(self, csr: CsrGraph, workers: int):
+        self.workers = workers
+        self.shared = SharedCsr(csr)
+        # Always spawn: once any compiled walker has started numba's thread pool in this process, even an
+        # uncompiled run would fork that live pool and hang the interpreter at exit
+        context = get_context("spawn")
+        self.pool = ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                                        initargs=(self.shared.spec, context.Lock()))
+
+    def walk(self, chunks, kappa: int, batch_size=None, use_numba=False):
+        # Hop counts of all the walks run by this pool so far, as a view over the shared accumulator
+        groups = [chunks[i::self.workers] for i in range(self.workers) if chunks[i::self.workers]]
+        list(self.pool.map(_walk_chunks_in_worker, groups, [kappa] * len(groups),
+                           [batch_size] * len(groups), [use_numba] * len(groups)))
+        return self.shared.counts
+
+    def close(self):
+        self.pool.shutdown()
+        self.shared.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def walk_chunks(csr: CsrGraph, chunks, kappa: int, batch_size=None, counts=None, lock=None, use_numba=False):
+    # With a lock, counts is a shared accumulator and only the touched entries are added under it
+    if counts is None:
+        counts = np.zeros(csr.edge_bound, dtype=np.int64)
+    row_keys = None if batch_size is None else adjacency_keys(csr)
+    start_sampler = UniformSampler(csr.nodes)
+    buffers = WalkBuffers(csr.node_bound, kappa)
+
+    for chunk_size, chunk_seed in chunks:
+        rng = np.random.default_rng(chunk_seed)
+        starts = start_sampler.sample(chunk_size, rng)
+        if use_numba:
+            trace = erw_walk_trace(csr, starts, rng.random((chunk_size, kappa - 1)), kappa)
+        elif batch_size is None:
+            uniforms = rng.random((chunk_size, kappa - 1))
+            trace = []
+            for start, walk_uniforms in zip(starts.tolist(), uniforms):
+                MessagePropagation_csr(csr, start, kappa, walk_uniforms, trace, buffers)
+            trace = np.asarray(trace, dtype=np.int64)
+        else:
+            trace = MessagePropagation_batch(csr, starts, kappa, rng, row_keys)
+
+        if lock is None:
+            counts += np.bincount(trace, minlength=csr.edge_bound)
+        else:
+            edges, hops = np.unique(trace, return_counts=True)
+            with lock:
+                counts[edges] += hops
+
+    return counts
+
+
+_worker_state = None
+
+
+def _init_worker(spec: dict, lock):
+    global _worker_state
+    _worker_state = attach_csr(spec) + (lock,)
+
+
+def _walk_chunks_in_worker(chunks, kappa: int, batch_size, use_numba):
+    _, csr, counts, lock = _worker_state
+    walk_chunks(csr, chunks, kappa, batch_size, counts, lock, use_numba)
+
+
+def MessagePropagation_csr(csr: CsrGraph, start: int, kappa: int, uniforms, trace: list, buffers: WalkBuffers):
+    # uniforms[i] in [0, 1) picks the (i + 1)-th hop among the unvisited neighbors;
+    # the edge id of every hop is appended to trace
+    offsets, neighbors, edge_ids = csr.offsets, csr.neighbors, csr.edge_ids
+    epoch = buffers.new_walk(start)
+    marks, candidates = buffers.marks, buffers.candidates
+    current = start
+
+    for step in range(kappa - 1):
+        low = int(offsets[current])
+        row = neighbors[low:offsets[current + 1]].tolist()
+        candidates.clear()
+        candidates.extend(i for i, v in enumerate(row) if marks[v] != epoch)
+
+        if not candidates:
+            break
+
+        position = low + candidates[int(uniforms[step] * len(candidates))]
+        trace.append(int(edge_ids[position]))
+        current = int(neighbors[position])
+        marks[current] = epoch
+
+
+def adjacency_keys(csr: CsrGraph):
+    # Sorted key source * node_bound + neighbor of every CSR entry, for vectorized edge lookups
+    sources = np.repeat(np.arange(csr.node_bound, dtype=np.int64), csr.degrees())
+    return sources * csr.node_bound + csr.neighbors
+
+
+def MessagePropagation_batch(csr: CsrGraph, starts: np.ndarray, kappa: int, rng, row_keys: np.ndarray):
+    """Advance one walker per start node in lock-step and return the edge ids of all hops.
+
+    Each walker keeps its path as a row of ``paths``; at every step the path nodes that
+    are neighbors of the current node are located in the CSR row by binary search, and
+    the walker jumps to a uniformly chosen free position of that row. Walkers with no
+    unvisited neighbor are dropped, exactly like the reference walker stops.
+    """
+    offsets, neighbors, edge_ids = csr.offsets, csr.neighbors, csr.edge_ids
+    node_bound = csr.node_bound
+
+    paths = np.empty((len(starts), kappa), dtype=np.int64)
+    paths[:, 0] = starts
+    walkers = np.arange(len(starts))
+    trace = []
+
+    for step in range(1, kappa):
+        current = paths[walkers, step - 1]
+        low = offsets[current]
+        degree = offsets[current + 1] - low
+
+        # Runs of row entries leading to a node already on each walker's path: every entry of a
+        # parallel edge is found, not just the first. Sorted by start, misses pushed to the end
+        keys = current[:, None] * node_bound + paths[walkers, :step]
+        widths = np.searchsorted(row_keys, keys, side="right") - np.searchsorted(row_keys, keys)
+        blocked = np.where(widths > 0, np.searchsorted(row_keys, keys) - low[:, None], np.iinfo(np.int64).max)
+        order = np.argsort(blocked, axis=1)
+        blocked = np.take_along_axis(blocked, order, axis=1)
+        widths = np.take_along_axis(widths, order, axis=1)
+        free = degree - widths.sum(axis=1)
+
+        alive = free > 0
+        if not alive.all():
+            walkers, low, blocked, widths, free = walkers[alive], low[alive], blocked[alive], widths[alive], free[alive]
+        if len(walkers) == 0:
+            break
+
+        # Map the r-th free position to its row offset by skipping the blocked runs
+        position = (rng.random(len(walkers)) * free).astype(np.int64)
+        for column in range(step):
+            position += np.where(blocked[:, column] <= position, widths[:, column], 0)
+
+        entry = low + position
+        trace.append(edge_ids[entry])
+        paths[walkers, step] = neighbors[entry]
+
+    if not trace:
+        return np.empty(0, dtype=np.int64)
+    return np.concatenate(trace)
+
+
+def edge_centrality_from_array(csr: CsrGraph, omega: np.ndarray, top_k: int = None):
+    # (u, v, weight) rows by decreasing weight; with top_k only the k best edges are selected
+    # (np.partition) and sorted, so just k tuples are built
+    if top_k is not None and top_k <= 0:
+        return []  # Like heapq.nlargest in the dict backends
+    valid = np.flatnonzero(csr.edge_u >= 0)
+    if top_k is not None and top_k < len(valid):
+        weights = omega[valid]
+        threshold = -np.partition(-weights, top_k - 1)[top_k - 1]
+        above = np.flatnonzero(weights > threshold)
+        # Ties on the threshold go to the lowest edge ids, as in the stable full sort
+        tied = np.flatnonzero(weights == threshold)[:top_k - len(above)]
+        valid = valid[np.sort(np.concatenate((above, tied)))]
+    order = valid[np.argsort(-omega[valid], kind="stable")]
+    return list(zip(csr.edge_u[order].tolist(), csr.edge_v[order].tolist(), omega[order].tolist()))
@@ -0,0 +1,124 @@
+import heapq
+import random
+from collections import defaultdict
+from networkit import Graph
+from start_sampler import uniform_start_sampler
+from walk_buffers import WalkBuffers
+
+
+
+class DynamicErw:
+    """ERW centrality kept up to date while edges are inserted in and removed from G.
+
+    The whole walk corpus is stored (the node path of every walk) together with, for each node,
+    the walks that visit it. After a batch of edges has been applied to G, ``update(edges)``
+    resamples each walk that visits an endpoint of a changed edge, from the first such node on:
+    the hops before it only chose among neighborhoods that did not change, so the corpus stays
+    distributed as a fresh ERW_KPath run on the new graph. Walks that never reach a changed
+    node are kept as they are, so an update costs time proportional to the walks through the
+    affected neighborhood, not to m. The number of walks follows rho = m; nodes added to G
+    only become start nodes of the walks added from then on.
+    """
+    kappa: int
+    paths: list
+    hops: dict
+    resampled: int
+
+    def __init__(self, G: Graph, kappa: int = 20, seed=None):
+        self.G = G
+        self.kappa = kappa
+        self.rng = random.Random(seed)
+        self.paths = []
+        self.walks_at = defaultdict(set)  # node -> ids of the walks visiting it
+        self.hops = defaultdict(int)  # (min, max) edge -> hops over it
+        self.buffers = WalkBuffers(G.upperNodeIdBound(), kappa)
+        self.start_sampler = None
+        self.resampled = 0  # Walks resampled by the last update
+        self.resize(G.numberOfEdges())
+
+    def update(self, edges):
+        # edges: the (u, v) pairs inserted in or removed from G since the last update
+        affected = {node for edge in edges for node in edge}
+        if self.G.upperNodeIdBound() > len(self.buffers.stamps):
+            self.buffers = WalkBuffers(self.G.upperNodeIdBound(), self.kappa)
+
+        walks = set()
+        for node in affected:
+            walks.update(self.walks_at.get(node, ()))
+        self.resampled = 0
+        for walk in walks:
+            path = self.paths[walk]
+            first = next(i for i, node in enumerate(path) if node in affected)
+            if first < self.kappa - 1:  # No hop is ever taken from the last node of a full walk
+                self._truncate(walk, first + 1)
+                self._extend(walk)
+                self.resampled += 1
+
+        self.resize(self.G.numberOfEdges())
+
+    def resize(self, rho: int):
+        # Walks are independent, so dropping the last ones or sampling new ones keeps the corpus exact
+        while len(self.paths) > rho:
+            self._truncate(len(self.paths) - 1, 0)
+            self.paths.pop()
+        if len(self.paths) == rho:
+            return
+
+        if self.start_sampler is None or len(self.start_sampler.nodes) != self.G.numberOfNodes():
+            self.start_sampler = uniform_start_sampler(self.G)
+        for start in self.start_sampler.sample(rho - len(self.paths), self.rng.getrandbits(64)).tolist():
+            self.paths.append([start])
+            self.walks_at[start].add(len(self.paths) - 1)
+            self._extend(len(self.paths) - 1)
+
+    def _truncate(self, walk: int, length: int):
+        # Undo every hop of the walk after its first length nodes
+        path = self.paths[walk]
+        for i in range(length, len(path)):
+            visits = self.walks_at[path[i]]
+            visits.discard(walk)
+            if not visits:
+                del self.walks_at[path[i]]
+            if i > 0:
+                key = (min(path[i - 1], path[i]), max(path[i - 1], path[i]))
+                self.hops[key] -= 1
+                if self.hops[key] == 0:
+                    del self.hops[key]
+        del path[length:]
+
+    def _extend(self, walk: int):
+        # Same hop rule as erw_kpath_final.MessagePropagation, continued from the end of the stored path
+        path = self.paths[walk]
+        epoch = self.buffers.new_walk(path[0])
+        marks, unvisited_neighbors = self.buffers.marks, self.buffers.candidates
+        for node in path[1:]:
+            marks[node] = epoch
+
+        for step in range(len(path), self.kappa):
+            unvisited_neighbors.clear()
+            unvisited_neighbors.extend(v for v in self.G.iterNeighbors(path[-1]) if marks[v] != epoch)
+            if not unvisited_neighbors:
+                break
+
+            next_node = self.rng.choice(unvisited_neighbors)
+            self.hops[(min(path[-1], next_node), max(path[-1], next_node))] += 1
+            marks[next_node] = epoch
+            path.append(next_node)
+            self.walks_at[next_node].add(walk)
+
+    def omega(self):
+        # Same weights as ERW_KPath with beta = 1 / m on the current graph
+        beta = 1.0 / self.G.numberOfEdges()
+        omega = {}
+        for u, v in self.G.iterEdges():
+            key = (min(u, v), max(u, v))
+            omega[key] = beta + beta * self.hops.get(key, 0)
+        return omega
+
+    def edge_centrality(self, top_k: int = None):
+        # (u, v, weight) rows sorted like erw_centrality_algorithm
+        omega = self.omega()
+        if top_k is None:
+            return sorted(((u, v, weight) for (u, v), weight in omega.items()), key=lambda x: x[2], reverse=True)
+        best = heapq.nlargest(top_k, omega.items(), key=lambda item: item[1])
+        return [(u, v, weight) for (u, v), weight in best]
@@ -1,7 +1,15 @@
+import heapq
 import random
-import networkit as nk
+import warnings
 from networkit import Graph
 from csv_writer import CsvWriter
+from csr_graph import csr_from_networkit
+from graph_loader import load_graph
+from profiler import profiler
+from start_sampler import uniform_start_sampler
+from walk_buffers import WalkBuffers
+from walk_kernels_numba import NUMBA_AVAILABLE
+from erw_kpath_csr import ERW_KPath_csr, ERW_KPath_adaptive, DEFAULT_BATCH_SIZE, edge_centrality_from_array
 
 
 
@@ -27,27 +35,37 @@ def initialize_weights(G: Graph):
 
 
 def ERW_KPath(G: Graph, kappa: int, rho: int, beta: float):
-    normalized_degrees = assign_normalized_degree(G)
-    omega = initialize_weights(G)
-
-    for i in range(rho):
-        vn = random.choice(list(G.iterNodes()))
-        #print(f"\nIterazione {i + 1}:")
-        #print(f"Nodo di partenza scelto: {vn}")
-        MessagePropagation(G, vn, kappa, omega, beta)
-        #print("Current edge weights:")
-        #for edge, weight in omega.items():
-            #print(f"Edge {edge}: {weight}")
+    with profiler.phase("degree_normalization"):
+        normalized_degrees = assign_normalized_degree(G)
+    with profiler.phase("weight_init"):
+        omega = initialize_weights(G)
+    with profiler.phase("start_sampling"):
+        # Seeded from the random module so that random.seed still makes runs reproducible
+        start_nodes = uniform_start_sampler(G).iter_sample(rho, random.getrandbits(64))
+    buffers = WalkBuffers(G.upperNodeIdBound(), kappa)
+
+    with profiler.phase("stepping"):
+        for i, vn in enumerate(start_nodes):
+            #print(f"\nIterazione {i + 1}:")
+            #print(f"Nodo di partenza scelto: {vn}")
+            MessagePropagation(G, vn, kappa, omega, beta, buffers)
+            #print("Current edge weights:")
+            #for edge, weight in omega.items():
+                #print(f"Edge {edge}: {weight}")
 
     return omega
 
 
-def MessagePropagation(G: Graph, start: int, kappa: int, omega: dict, beta: float):
-    path = [start]
+def MessagePropagation(G: Graph, start: int, kappa: int, omega: dict, beta: float, buffers: WalkBuffers = None):
+    if buffers is None:
+        buffers = WalkBuffers(G.upperNodeIdBound(), kappa)
+    epoch = buffers.new_walk(start)
+    marks, path, unvisited_neighbors = buffers.marks, buffers.path, buffers.candidates
     #print(f"Cammino: {start}", end="")
 
-    for _ in range(kappa - 1):  # kappa - 1 perché il nodo di partenza è già nel cammino
-        unvisited_neighbors = [v for v in G.iterNeighbors(path[-1]) if v not in path]
+    for step in range(1, kappa):  # il nodo di partenza è già nel cammino
+        unvisited_neighbors.clear()
+        unvisited_neighbors.extend(v for v in G.iterNeighbors(path[step - 1]) if marks[v] != epoch)
 
         if not unvisited_neighbors:
             #print(" (terminato: nessun vicino non visitato)")
@@ -56,9 +74,15 @@ def MessagePropagation(G: Graph, start: int, kappa: int, omega: dict, beta: floa
         next_node = random.choice(unvisited_neighbors)
         #print(f" -> {next_node}", end="")
 
-        update_edge_weight(omega, path[-1], next_node, beta)
-        path.append(next_node)
+        update_edge_weight(omega, path[step - 1], next_node, beta)
+        marks[next_node] = epoch
+        path[step] = next_node
+    else:
+        step = kappa
 
+    if profiler.enabled:
+        profiler.observe("walk_hops", step - 1)
+        profiler.count("hops", step - 1)
     #print()
 
 
@@ -72,23 +96,56 @@ def mark_edge_visited(omega: dict, u: int, v: int):
     omega[key] = 1
 
 
-def erw_centrality_algorithm(G: Graph):
+def erw_centrality_algorithm(G: Graph, backend: str = "dict", seed=None, batch_size: int = DEFAULT_BATCH_SIZE,
+                             workers: int = 1, tolerance: float = None, checkpoint: int = None,
+                             return_walks: bool = False, top_k: int = None):
+    # With a tolerance the walks stop early once the ranking is stable between checkpoints;
+    # return_walks=True also returns the number of walks actually run;
+    # top_k=k returns only the k most central edges instead of all m
     kappa = 20  # Maximum path length
     rho = G.numberOfEdges()  # Number of iterations
     beta = 1.0 / G.numberOfEdges()  # Weight increment
 
+    if backend == "numba" and not NUMBA_AVAILABLE:
+        warnings.warn("numba is not installed, falling back to the csr backend")
+        backend = "csr"
+    if backend in ("csr", "batch", "numba"):
+        with profiler.phase("csr_conversion"):
+            csr = csr_from_networkit(G)
+        walker_options = dict(seed=seed, batch_size=batch_size if backend == "batch" else None, workers=workers,
+                              use_numba=backend == "numba")
+        with profiler.phase("stepping"):
+            if tolerance is None:
+                omega, walks = ERW_KPath_csr(csr, kappa, rho, beta, **walker_options), rho
+            else:
+                omega, walks = ERW_KPath_adaptive(csr, kappa, rho, beta, tolerance, checkpoint, **walker_options)
+        with profiler.phase("sorting"):
+            edge_centrality_sorted = edge_centrality_from_array(csr, omega, top_k)
+        return (edge_centrality_sorted, walks) if return_walks else edge_centrality_sorted
+    if backend != "dict":
+        raise ValueError(f"unknown ERW backend: {backend}")
+    if workers > 1:
+        raise ValueError("the dict backend runs on a single process, use backend=\"csr\", \"batch\" or \"numba\"")
+    if tolerance is not None:
+        raise ValueError("early stopping needs an array backend, use backend=\"csr\", \"batch\" or \"numba\"")
+
     omega = ERW_KPath(G, kappa, rho, beta)
 
-    edge_centrality = [(u, v, weight) for (u, v), weight in omega.items()]
-    edge_centrality_sorted = sorted(edge_centrality, key=lambda x: x[2], reverse=True)
+    with profiler.phase("sorting"):
+        if top_k is None:
+            edge_centrality = [(u, v, weight) for (u, v), weight in omega.items()]
+            edge_centrality_sorted = sorted(edge_centrality, key=lambda x: x[2], reverse=True)
+        else:
+            # Bounded heap over the dict: only the k selected edges become result rows
+            best = heapq.nlargest(top_k, omega.items(), key=lambda item: item[1])
+            edge_centrality_sorted = [(u, v, weight) for (u, v), weight in best]
 
-    return edge_centrality_sorted
+    return (edge_centrality_sorted, rho) if return_walks else edge_centrality_sorted
 
 
 def main():
     # Load graph
-    reader = nk.graphio.EdgeListReader(separator=" ", firstNode=0, continuous=False, directed=False)
-    G = reader.read("./graph/graph(n=4, m=5).txt")
+    G = load_graph("./graph/graph(n=4, m=5).txt")
 
     #print(f"Grafo caricato. Nodi: {G.numberOfNodes()}, Archi: {G.numberOfEdges()}")
 
@@ -100,7 +157,9 @@ def main():
         dict_csv_row = {"edge": f"{u}, {v}", "centrality": weight}
         csv_data.append(dict_csv_row)
         ##print(f"Edge ({u}, {v}): {weight}")
-    CsvWriter().write(csv_data, "./csv_files/centrality_ERW", ["edge", "centrality"])
+    with profiler.phase("csv_write"):
+        CsvWriter().write(csv_data, "./csv_files/centrality_ERW", ["edge", "centrality"])
+    profiler.dump()  # Only with KPATH_PROFILE=<report.json> set
 
 
 if __name__ == "__main__":
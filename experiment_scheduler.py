@@ -0,0 +1,96 @@
+import os
+import json
+import time
+from collections import deque
+from multiprocessing import Process
+from multiprocessing.connection import wait
+
+
+STATUS_OK = "ok"
+STATUS_FAILED = "failed"
+STATUS_TIMEOUT = "timeout"
+
+
+
+class ScheduledJob:
+    """One experiment run: ``target(record_path, *args)`` must write its JSON record to record_path.
+
+    The record is the job's log as far as the scheduler is concerned: a job whose record says
+    ``"status": "ok"`` is done and is skipped when the run is resumed.
+    """
+    record_path: str
+    args: tuple
+
+    def __init__(self, record_path: str, args: tuple):
+        self.record_path = record_path
+        self.args = args
+
+
+def read_record(path: str):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def write_record(path: str, record: dict):
+    # Atomic, so an interrupted job never leaves a record that looks complete
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w") as file:
+        json.dump(record, file)
+    os.replace(path + ".tmp", path)
+
+
+def available_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return [None] * os.cpu_count()  # No pinning on this platform
+
+
+def _run_pinned(core, target, record_path: str, args: tuple):
+    if core is not None:
+        os.sched_setaffinity(0, {core})
+    target(record_path, *args)
+
+
+def run_jobs(jobs, target, concurrency: int, timeout: float = None):
+    """Run every job not already done on its own process, at most concurrency at a time.
+
+    Each process is pinned to a core of its own, so concurrent jobs do not compete for a CPU;
+    concurrency is therefore capped at the number of cores available to this process. A job
+    still running after timeout seconds is terminated and recorded as timed out, one that dies
+    without writing its record as failed; both are run again on resume. Returns the records
+    of all the jobs, in order.
+    """
+    cores = available_cores()[:max(1, concurrency)]
+    pending = deque(job for job in jobs if (read_record(job.record_path) or {}).get("status") != STATUS_OK)
+    running = {}  # process sentinel -> (process, job, core, start time)
+
+    while pending or running:
+        while pending and cores:
+            job = pending.popleft()
+            core = cores.pop()
+            process = Process(target=_run_pinned, args=(core, target, job.record_path, job.args))
+            process.start()
+            running[process.sentinel] = (process, job, core, time.monotonic())
+
+        now = time.monotonic()
+        deadline = None if timeout is None else min(started for *_, started in running.values()) + timeout
+        wait(list(running), None if deadline is None else max(0.0, deadline - now))
+
+        for sentinel, (process, job, core, started) in list(running.items()):
+            if process.exitcode is None:
+                if timeout is None or time.monotonic() - started < timeout:
+                    continue
+                process.terminate()
+                process.join()
+                write_record(job.record_path, dict(status=STATUS_TIMEOUT, timeout=timeout))
+            else:
+                process.join()
+                if (read_record(job.record_path) or {}).get("status") != STATUS_OK:
+                    write_record(job.record_path, dict(status=STATUS_FAILED, exitcode=process.exitcode))
+            del running[sentinel]
+            cores.append(core)
+
+    return [read_record(job.record_path) for job in jobs]
@@ -0,0 +1,227 @@
+import os
+import json
+import mmap
+import shutil
+import hashlib
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from multiprocessing import get_context
+import numpy as np
+import networkit as nk
+from csr_graph import CsrGraph, csr_from_edges
+
+
+CHUNK_BYTES = 16 * 2 ** 20  # Bytes parsed at once by a worker
+PARSE_SCRATCH = 6  # Peak bytes parse_chunk holds per input byte, its output included
+PARSE_MEMORY = 2 ** 30  # Budget for the chunks parsed at the same time, which caps the workers
+COMMENT_PREFIXES = np.frombuffer(b"#%", dtype=np.uint8)
+CACHE_SUFFIX = ".npcache"  # Binary cache directory written next to each edge list
+CACHE_VERSION = 3  # 2: self-loops appear once in their row; 3: weight columns are no longer read as ids
+CACHE_ARRAYS = ("offsets", "neighbors", "edge_ids", "edge_u", "edge_v")
+
+
+
+def chunk_bounds(mm, size: int, chunk_bytes: int = CHUNK_BYTES):
+    # [start, end) byte ranges of about chunk_bytes, each ending right after a newline
+    bounds = []
+    start = 0
+    while start < size:
+        end = mm.find(b"\n", min(start + chunk_bytes, size) - 1)
+        end = size if end < 0 else end + 1
+        bounds.append((start, end))
+        start = end
+    return bounds
+
+
+def parse_chunk(data: np.ndarray):
+    """Node ids of a whitespace separated edge list chunk (uint8 array), two per line, in order.
+
+    Only the first two numbers of a line are kept, so a weight column (``u v 1``) is ignored
+    like EdgeListReader ignores it; a line with a single number raises ValueError. Vectorized
+    per number rather than per byte: the scratch arrays over the whole chunk are single bytes
+    (about 4 bytes per input byte in all) and every number is folded in by one pass per digit
+    position over int32 offsets. Lines starting with '#' or '%' are skipped.
+    """
+    digits = ((data >= ord("0")) & (data <= ord("9"))).view(np.int8)
+    # +1 where a digit run starts, -1 one past where it ends
+    edges = np.diff(digits, prepend=np.int8(0), append=np.int8(0))
+    del digits
+    starts = np.flatnonzero(edges == 1).astype(np.int32)
+    lengths = (np.flatnonzero(edges == -1) - starts).astype(np.int8)
+    del edges
+    if len(starts) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    line_starts = np.flatnonzero(data == ord("\n")).astype(np.int32) + 1
+    line_starts = np.concatenate(([0], line_starts[line_starts < len(data)])).astype(np.int32)
+    lines = (np.searchsorted(line_starts, starts, side="right") - 1).astype(np.int32)
+    keep = ~np.isin(data[line_starts[lines]], COMMENT_PREFIXES)
+    # The first two numbers of every line: a token opening its line, or the one right after it
+    first = np.ones(len(lines), dtype=bool)
+    first[1:] = lines[1:] != lines[:-1]
+    second = np.zeros(len(lines), dtype=bool)
+    second[1:] = first[:-1] & ~first[1:]
+    single = first & ~np.append(second[1:], False) & keep
+    if single.any():
+        start = int(line_starts[lines[np.argmax(single)]])
+        end = data[start:].tobytes().find(b"\n")
+        line = data[start:start + end if end >= 0 else len(data)].tobytes().decode(errors="replace")
+        raise ValueError(f"expected two node ids per line, got {line.strip()!r}")
+    keep &= first | second
+    del lines, first, second
+    starts, lengths = starts[keep], lengths[keep]
+
+    values = np.zeros(len(starts), dtype=np.int64)
+    for position in range(int(lengths.max()) if len(lengths) else 0):
+        # Numbers still having a digit at this position shift left by one decimal place
+        longer = np.flatnonzero(lengths > position)
+        values[longer] = values[longer] * 10 + (data[starts[longer] + position] - ord("0"))
+    return values
+
+
+def _parse_range(path: str, start: int, end: int):
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        data = np.frombuffer(mm, dtype=np.uint8, count=end - start, offset=start)
+        try:
+            tokens, problem = parse_chunk(data), None
+        except ValueError as error:
+            # Raised only once the map is closed: the traceback still points into the view
+            tokens, problem = None, str(error)
+        del data  # The view must go before the map is closed
+    if problem is not None:
+        raise ValueError(f"{path}: {problem}")
+    return tokens
+
+
+def read_edge_tokens(path: str, workers: int = None, chunk_bytes: int = CHUNK_BYTES):
+    # The first two node ids of every line in order; chunks are parsed on workers processes
+    # (default: all cores), never more than fit together in PARSE_MEMORY
+    size = os.path.getsize(path)
+    if size == 0:
+        return np.empty(0, dtype=np.int64)
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        bounds = chunk_bounds(mm, size, chunk_bytes)
+
+    starts, ends = zip(*bounds)
+    workers = min(workers or os.cpu_count(), len(bounds), max(1, PARSE_MEMORY // (PARSE_SCRATCH * chunk_bytes)))
+    if workers == 1:
+        parts = list(map(_parse_range, repeat(path), starts, ends))
+    else:
+        # spawn, not fork: load_graph also runs on the prefetch thread of the experiments while
+        # the main thread may be inside numba or BLAS, and forking a threaded process can hang
+        with ProcessPoolExecutor(workers, mp_context=get_context("spawn")) as pool:
+            parts = list(pool.map(_parse_range, repeat(path), starts, ends))
+    return np.concatenate(parts)
+
+
+def remap_first_appearance(tokens: np.ndarray):
+    # Continuous ids numbered in order of first appearance, like EdgeListReader(continuous=False)
+    unique, first, inverse = np.unique(tokens, return_index=True, return_inverse=True)
+    rank = np.empty(len(unique), dtype=np.int64)
+    rank[np.argsort(first, kind="stable")] = np.arange(len(unique))
+    return rank[inverse.ravel()], len(unique)
+
+
+def read_edge_list(path: str, workers: int = None, chunk_bytes: int = CHUNK_BYTES):
+    """``(edge_u, edge_v, n)`` of a whitespace separated undirected edge list.
+
+    Ids are remapped to 0..n-1 in order of first appearance and repeated edges are dropped,
+    keeping the first occurrence, so the result matches what EdgeListReader(separator=" ",
+    firstNode=0, continuous=False, directed=False) reads from the same file.
+    """
+    ids, n = remap_first_appearance(read_edge_tokens(path, workers, chunk_bytes))
+    low = np.minimum(ids[0::2], ids[1::2])
+    high = np.maximum(ids[0::2], ids[1::2])
+    _, first = np.unique(low * n + high, return_index=True)
+    first.sort()
+    return low[first], high[first], n
+
+
+def file_digest(path: str):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(CHUNK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_directory(path: str):
+    return path + CACHE_SUFFIX
+
+
+def read_cache(path: str):
+    """The cached CsrGraph of path, memory-mapped, or None when there is no valid cache.
+
+    The cache is valid when its version and the file size match and either the mtime matches
+    too or, after a touch or a copy, the content hash still does.
+    """
+    directory = cache_directory(path)
+    try:
+        with open(os.path.join(directory, "meta.json")) as file:
+            meta = json.load(file)
+    except (OSError, ValueError):
+        return None
+    status = os.stat(path)
+    if meta.get("version") != CACHE_VERSION or meta.get("size") != status.st_size:
+        return None
+    if meta.get("mtime_ns") != status.st_mtime_ns:
+        if meta.get("sha256") != file_digest(path):
+            return None
+        meta["mtime_ns"] = status.st_mtime_ns
+        try:
+            write_meta(directory, meta)
+        except OSError:
+            pass
+
+    try:
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in CACHE_ARRAYS}
+    except (OSError, ValueError):
+        return None
+    return CsrGraph(nodes=np.arange(meta["nodes"], dtype=np.int64), **arrays)
+
+
+def write_meta(directory: str, meta: dict):
+    with open(os.path.join(directory, "meta.json.tmp"), "w") as file:
+        json.dump(meta, file)
+    os.replace(os.path.join(directory, "meta.json.tmp"), os.path.join(directory, "meta.json"))
+
+
+def write_cache(path: str, csr: CsrGraph):
+    # Written to a temporary directory first, so readers never see half a cache
+    status = os.stat(path)
+    directory = cache_directory(path)
+    staging = f"{directory}.{os.getpid()}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    try:
+        for name in CACHE_ARRAYS:
+            np.save(os.path.join(staging, f"{name}.npy"), getattr(csr, name))
+        write_meta(staging, dict(version=CACHE_VERSION, size=status.st_size, mtime_ns=status.st_mtime_ns,
+                                 sha256=file_digest(path), nodes=csr.number_of_nodes))
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(staging, directory)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def load_csr(path: str, workers: int = None, chunk_bytes: int = CHUNK_BYTES, cache: bool = True) -> CsrGraph:
+    # With cache the first load writes path + CACHE_SUFFIX and later loads memory-map it
+    csr = read_cache(path) if cache else None
+    if csr is not None:
+        return csr
+    edge_u, edge_v, n = read_edge_list(path, workers, chunk_bytes)
+    csr = csr_from_edges(edge_u, edge_v, n)
+    if cache:
+        try:
+            write_cache(path, csr)
+        except OSError as error:
+            warnings.warn(f"could not write the graph cache of {path}: {error}")
+    return csr
+
+
+def load_graph(path: str, workers: int = None, chunk_bytes: int = CHUNK_BYTES, cache: bool = True):
+    # networkit Graph built in one call from the edge arrays, no Python loop over the edges
+    csr = load_csr(path, workers, chunk_bytes, cache)
+    return nk.GraphFromCoo((csr.edge_u.astype(np.uint64), csr.edge_v.astype(np.uint64)),
+                           n=csr.number_of_nodes, directed=False)
@@ -53,21 +53,26 @@ class StdGraphGenerator(GraphGenerator):
         self.doubling_m_factor = doubling_m_factor
         self.max_number_of_graph = max_number_of_graph
 
+    def next_graph(self):
+        # Writes the graph of the current size, doubles the size and returns the file path
+        G = double_exp_generator(self.n, self.m)
+        if not os.path.exists(self.result_folder):
+            os.makedirs(self.result_folder)
+        path = f"{self.result_folder}/{self.graph_flag}(n={self.n}, m={self.m}).txt"
+        nk.graphio.EdgeListWriter(separator=" ", firstNode=0).write(G, path)
+        print("genereted: ", path)
+
+        self.n *= self.doubling_n_factor
+        self.m *= self.doubling_m_factor
+        return path
+
     def run(self):
         generate = True
         numberOfGraph = 0
-        writer = nk.graphio.EdgeListWriter(separator=" ", firstNode=0)
 
         while generate and numberOfGraph < self.max_number_of_graph:
             try:
-                G = double_exp_generator(self.n, self.m)
-                if not os.path.exists(self.result_folder):
-                    os.makedirs(self.result_folder)
-                writer.write(G, f"{self.result_folder}/{self.graph_flag}(n={self.n}, m={self.m}).txt")
-                print("genereted: ", f"{self.result_folder}/{self.graph_flag}(n={self.n}, m={self.m}).txt")
-
-                self.n *= self.doubling_n_factor
-                self.m *= self.doubling_m_factor
+                self.next_graph()
                 numberOfGraph += 1
             except:
                 generate = False
@@ -10,4 +10,8 @@ class GraphGenerator:
         self.graph_flag = graph_flag
 
     def run(self):
+        raise NotImplementedError("abstract method")
+
+    def next_graph(self):
+        # Generate and write the next graph of the series, returning its file path
         raise NotImplementedError("abstract method")
\ No newline at end of file
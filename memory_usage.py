@@ -0,0 +1,44 @@
+import sys
+import resource
+import tracemalloc
+
+
+
+def reset_peak_rss():
+    # Linux >= 4.0: writing 5 to clear_refs resets VmHWM, the peak resident set size of the process
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_bytes():
+    """Peak resident set size since the last reset_peak_rss (since process start where it cannot be reset)."""
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # kB everywhere but on macOS
+
+
+class TracedPeak:
+    """Peak bytes allocated through Python inside a with block, when tracemalloc is tracing (0 otherwise)."""
+    peak: int
+
+    def __enter__(self):
+        self.peak = 0
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            self.base = tracemalloc.get_traced_memory()[0]
+        return self
+
+    def __exit__(self, *exc_info):
+        if tracemalloc.is_tracing():
+            self.peak = max(0, tracemalloc.get_traced_memory()[1] - self.base)
+        return False
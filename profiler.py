@@ -0,0 +1,99 @@
+import os
+import json
+import math
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+from memory_usage import TracedPeak
+
+
+PROFILE_ENV = "KPATH_PROFILE"  # When set, profiling is on and the report is dumped to this JSON path
+_NO_PHASE = nullcontext()
+
+
+
+class _Phase:
+    def __init__(self, profiler, name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.memory = TracedPeak().__enter__()
+        self.start = time.perf_counter_ns()
+
+    def __exit__(self, *exc_info):
+        self.profiler.add_time(self.name, time.perf_counter_ns() - self.start)
+        self.memory.__exit__(*exc_info)
+        self.profiler.add_peak(self.name, self.memory.peak)
+        return False
+
+
+class Profiler:
+    """Phase timers, counters and power-of-two histograms for the walk engines.
+
+    Disabled, ``phase`` returns one shared no-op context manager and hot loops guard their
+    ``observe`` / ``count`` calls with ``if profiler.enabled``, so instrumentation costs an
+    attribute lookup. Everything is aggregated in memory and written once by ``dump``. While
+    tracemalloc is tracing, each phase also keeps the largest peak of Python allocations seen
+    inside it; phases must not be nested for those peaks to be right.
+    """
+    enabled: bool
+    path: str
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.enabled = path is not None
+        self.reset()
+
+    def enable(self, path: str = None):
+        self.path = path or self.path
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self.phase_calls = defaultdict(int)
+        self.phase_ns = defaultdict(int)
+        self.phase_peak_bytes = defaultdict(int)
+        self.counters = defaultdict(int)
+        self.histograms = defaultdict(lambda: defaultdict(int))
+
+    def phase(self, name: str):
+        return _Phase(self, name) if self.enabled else _NO_PHASE
+
+    def add_time(self, name: str, nanoseconds: int):
+        self.phase_calls[name] += 1
+        self.phase_ns[name] += nanoseconds
+        self.observe(f"{name}_us", nanoseconds / 1000)
+
+    def add_peak(self, name: str, peak: int):
+        self.phase_peak_bytes[name] = max(self.phase_peak_bytes[name], peak)
+
+    def count(self, name: str, value: int = 1):
+        if self.enabled:
+            self.counters[name] += value
+
+    def observe(self, name: str, value: float):
+        # Bucket b counts the values in [2^(b-1), 2^b), bucket 0 the values below 1
+        if self.enabled:
+            self.histograms[name][0 if value < 1 else math.floor(math.log2(value)) + 1] += 1
+
+    def report(self):
+        return dict(
+            phases={name: dict(calls=self.phase_calls[name], seconds=self.phase_ns[name] / 1e9,
+                               peak_bytes=self.phase_peak_bytes[name])
+                    for name in self.phase_ns},
+            counters=dict(self.counters),
+            histograms={name: {f"<{2 ** bucket}": count for bucket, count in sorted(buckets.items())}
+                        for name, buckets in self.histograms.items()})
+
+    def dump(self, path: str = None):
+        path = path or self.path
+        if not self.enabled or path is None:
+            return
+        with open(path, "w") as file:
+            json.dump(self.report(), file, indent=2)
+
+
+profiler = Profiler(os.environ.get(PROFILE_ENV))
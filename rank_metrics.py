@@ -0,0 +1,134 @@
+import math
+import numpy as np
+
+
+DEFAULT_TOP_K = 100
+
+
+
+def top_k_edges(scores: np.ndarray, k: int):
+    # Ids of the k highest scores, in no particular order
+    k = min(k, len(scores))
+    if k == len(scores):
+        return np.arange(len(scores))
+    return np.argpartition(-scores, k - 1)[:k]
+
+
+def top_k_overlap(scores_a: np.ndarray, scores_b: np.ndarray, k: int):
+    # Fraction of the top-k edges of a that are also among the top-k edges of b
+    k = min(k, len(scores_a))
+    if k == 0:
+        return 1.0
+    shared = np.intersect1d(top_k_edges(scores_a, k), top_k_edges(scores_b, k), assume_unique=True)
+    return len(shared) / k
+
+
+def rank_array(scores: np.ndarray):
+    # rank[e] = position of edge e in the ranking by decreasing score, ties in edge id order
+    order = np.argsort(-np.asarray(scores), kind="stable")
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = np.arange(len(order))
+    return ranks
+
+
+def average_ranks(scores: np.ndarray):
+    # Ranks by increasing score where tied scores share the mean of their positions
+    scores = np.asarray(scores)
+    order = np.argsort(scores, kind="stable")
+    sorted_scores = scores[order]
+    starts = np.flatnonzero(np.concatenate(([True], sorted_scores[1:] != sorted_scores[:-1])))
+    ends = np.append(starts[1:], len(scores))
+    ranks = np.empty(len(scores), dtype=np.float64)
+    ranks[order] = np.repeat((starts + ends - 1) / 2, ends - starts)
+    return ranks
+
+
+def mean_rank_displacement(scores_a: np.ndarray, scores_b: np.ndarray):
+    # Mean over the edges of how many places an edge moves between the two rankings
+    if len(scores_a) == 0:
+        return 0.0
+    return float(np.mean(np.abs(rank_array(scores_a) - rank_array(scores_b))))
+
+
+def spearman_rho(scores_a: np.ndarray, scores_b: np.ndarray):
+    ranks_a = average_ranks(scores_a) - (len(scores_a) - 1) / 2
+    ranks_b = average_ranks(scores_b) - (len(scores_b) - 1) / 2
+    denominator = math.sqrt(float(np.dot(ranks_a, ranks_a)) * float(np.dot(ranks_b, ranks_b)))
+    # Constant score vectors have no defined rho; they rank all edges alike
+    return 1.0 if denominator == 0 else float(np.dot(ranks_a, ranks_b)) / denominator
+
+
+def count_inversions(values: np.ndarray):
+    """Pairs i < j with values[i] > values[j], by a bottom-up merge sort.
+
+    Every level merges all the block pairs at once: left blocks shifted by pair index are one
+    sorted array, so a single searchsorted counts, for each right element, the larger left
+    elements of its own pair. O(m log^2 m) in numpy calls over log m levels.
+    """
+    n = len(values)
+    if n < 2:
+        return 0
+    _, dense = np.unique(values, return_inverse=True)
+    size = 1 << (n - 1).bit_length()
+    # Padding with values above all the others adds no inversion
+    blocks = np.full(size, n, dtype=np.int64)
+    blocks[:n] = dense.ravel()
+
+    inversions = 0
+    width = 1
+    while width < size:
+        pairs = blocks.reshape(-1, 2, width)
+        offsets = np.arange(len(pairs), dtype=np.int64)[:, None] * (n + 1)
+        left = (pairs[:, 0] + offsets).ravel()
+        right = (pairs[:, 1] + offsets).ravel()
+        not_larger = np.searchsorted(left, right, side="right") - np.repeat(np.arange(len(pairs)) * width, width)
+        inversions += int(np.sum(width - not_larger))
+        blocks = np.sort(blocks.reshape(-1, 2 * width), axis=1).ravel()
+        width *= 2
+    return inversions
+
+
+def tied_pairs(values: np.ndarray):
+    _, counts = np.unique(values, return_counts=True)
+    return int(np.sum(counts * (counts - 1) // 2))
+
+
+def kendall_tau(scores_a: np.ndarray, scores_b: np.ndarray):
+    """Kendall tau-b in O(m log^2 m) (Knight's algorithm), the variant scipy.stats.kendalltau computes."""
+    scores_a, scores_b = np.asarray(scores_a), np.asarray(scores_b)
+    n = len(scores_a)
+    order = np.lexsort((scores_b, scores_a))
+    a, b = scores_a[order], scores_b[order]
+
+    pairs = n * (n - 1) // 2
+    ties_a = tied_pairs(a)
+    ties_b = tied_pairs(b)
+    joint = np.concatenate(([True], (a[1:] != a[:-1]) | (b[1:] != b[:-1])))
+    joint_counts = np.diff(np.append(np.flatnonzero(joint), n))
+    ties_both = int(np.sum(joint_counts * (joint_counts - 1) // 2))
+    # Sorting by (a, b) leaves b inverted exactly on the discordant pairs
+    discordant = count_inversions(b)
+
+    denominator = math.sqrt(float(pairs - ties_a) * float(pairs - ties_b))
+    # Constant score vectors have no defined tau; they rank all edges alike
+    if denominator == 0:
+        return 1.0
+    return (pairs - ties_a - ties_b + ties_both - 2 * discordant) / denominator
+
+
+def compare_rankings(scores_a: np.ndarray, scores_b: np.ndarray, k: int = DEFAULT_TOP_K):
+    # All the rank agreement measures of two score arrays indexed by the same edge ids
+    return dict(displacement=mean_rank_displacement(scores_a, scores_b),
+                spearman=spearman_rho(scores_a, scores_b),
+                kendall=kendall_tau(scores_a, scores_b),
+                top_k_overlap=top_k_overlap(np.asarray(scores_a), np.asarray(scores_b), k))
+
+
+def aligned_scores(*results):
+    """Score arrays of result dicts {(u, v): score} over the union of their edges, in sorted edge order.
+
+    An edge missing from one result scores 0 there. Returns the edge list and one array per result.
+    """
+    edges = sorted(set().union(*results))
+    return edges, [np.fromiter((result.get(edge, 0.0) for edge in edges), dtype=np.float64, count=len(edges))
+                   for result in results]
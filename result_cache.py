@@ -0,0 +1,110 @@
+import os
+import json
+import random
+import hashlib
+import numpy as np
+from networkit import Graph
+from csr_graph import csr_from_networkit
+from comparison_matrix import EdgeIndex
+
+
+RESULT_CACHE_ENV = "KPATH_RESULT_CACHE"  # Overrides the cache directory
+DEFAULT_CACHE_DIRECTORY = ".result_cache"
+RESULT_CACHE_VERSION = 1
+
+
+
+def graph_fingerprint(index: EdgeIndex):
+    # Content hash of the graph as edge ids see it: the same edges under other ids are another graph
+    digest = hashlib.sha256()
+    digest.update(np.int64(index.csr.node_bound).tobytes())
+    digest.update(np.ascontiguousarray(index.csr.edge_u, dtype=np.int64).tobytes())
+    digest.update(np.ascontiguousarray(index.csr.edge_v, dtype=np.int64).tobytes())
+    return digest.hexdigest()
+
+
+def cache_key(fingerprint: str, name: str, params: dict):
+    description = json.dumps(dict(version=RESULT_CACHE_VERSION, graph=fingerprint, algorithm=name, params=params),
+                             sort_keys=True, default=str)
+    return hashlib.sha256(description.encode()).hexdigest()
+
+
+class ResultCache:
+    """Edge-id indexed scores on disk, keyed by graph content and algorithm parameters.
+
+    Every entry is ``<key>.npy`` with a ``<key>.json`` description next to it; both are written
+    to a temporary name and renamed, so concurrent processes sharing the directory see either
+    a complete entry or none.
+    """
+    directory: str
+
+    def __init__(self, directory: str = None):
+        self.directory = directory or os.environ.get(RESULT_CACHE_ENV, DEFAULT_CACHE_DIRECTORY)
+        self._graph = None
+        self._index = None
+        self._fingerprint = None
+
+    def graph_index(self, G: Graph):
+        # Edge index and fingerprint of the last graph seen, so repetitions on one graph hash it once
+        if G is not self._graph:
+            self._index = EdgeIndex(csr_from_networkit(G))
+            self._fingerprint = graph_fingerprint(self._index)
+            self._graph = G
+        return self._index, self._fingerprint
+
+    def path(self, key: str, extension: str):
+        return os.path.join(self.directory, f"{key}.{extension}")
+
+    def load(self, key: str):
+        try:
+            return np.load(self.path(key, "npy"))
+        except (OSError, ValueError):
+            return None
+
+    def store(self, key: str, scores: np.ndarray, description: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path(key, "npy.tmp"), "wb") as file:
+            np.save(file, scores)
+        with open(self.path(key, "json.tmp"), "w") as file:
+            json.dump(description, file, default=str)
+        os.replace(self.path(key, "json.tmp"), self.path(key, "json"))
+        os.replace(self.path(key, "npy.tmp"), self.path(key, "npy"))
+
+    def scores(self, G: Graph, name: str, compute, params: dict = None):
+        """Cached scores of name with params on G, computing and storing them with compute() on a miss.
+
+        compute returns anything EdgeIndex.scores accepts; edge-id indexed arrays are kept as
+        they are, other results as float32 arrays.
+        """
+        params = params or {}
+        index, fingerprint = self.graph_index(G)
+        key = cache_key(fingerprint, name, params)
+        scores = self.load(key)
+        if scores is None:
+            result = compute()
+            scores = result if isinstance(result, np.ndarray) else index.scores(result)
+            self.store(key, scores, dict(graph=fingerprint, algorithm=name, params=params))
+        return scores
+
+    def deterministic(self, name: str, algorithm, **params):
+        # algorithm(G, **params) as a registry function that is computed once per graph
+        return lambda G: self.scores(G, name, lambda: algorithm(G, **params), params)
+
+    def seeded(self, name: str, algorithm, seed: int, **params):
+        """algorithm(G, seed=..., **params) as a registry function whose i-th call runs with seed + i.
+
+        The random module is seeded as well, for the backends that draw from it. Each call is a
+        new repetition, but a later session with the same seed finds all its repetitions cached.
+        """
+        calls = 0
+
+        def run(G: Graph):
+            nonlocal calls
+            run_seed = seed + calls
+            calls += 1
+
+            def compute():
+                random.seed(run_seed)
+                return algorithm(G, seed=run_seed, **params)
+            return self.scores(G, name, compute, dict(params, seed=run_seed))
+        return run
@@ -0,0 +1,133 @@
+import math
+import time
+import numpy as np
+from csr_graph import CsrGraph
+from rank_metrics import DEFAULT_TOP_K, top_k_edges
+
+
+BATCH_ENTRIES = 1 << 22  # Sources searched together are capped at this many (source, edge id) cells
+MIN_SAMPLES = 2  # A standard error needs the spread of at least two sources
+
+
+
+class SampledBetweenness:
+    """Edge betweenness estimated from a uniform sample of source nodes.
+
+    scores and standard_errors are indexed by edge id; scores is unbiased for the exact,
+    unnormalized edge betweenness (as networkit computes it) and becomes exact once every
+    node has been a source, where the standard errors drop to 0. The standard errors come from
+    the spread of the per-source dependencies, so they are too small for edges whose betweenness
+    is carried by a few sources not in the sample (typically the edge's own endpoints); the
+    spread over repeated runs is the safer error bar there.
+    """
+    scores: np.ndarray
+    standard_errors: np.ndarray
+    samples: int
+    nodes: int
+    seconds: float
+
+    def __init__(self, scores, standard_errors, samples: int, nodes: int, seconds: float):
+        self.scores = scores
+        self.standard_errors = standard_errors
+        self.samples = samples
+        self.nodes = nodes
+        self.seconds = seconds
+
+    def relative_error(self, k: int = DEFAULT_TOP_K):
+        # Mean standard error relative to the score over the k most central edges
+        top = top_k_edges(self.scores, k)
+        top = top[self.scores[top] > 0]
+        return float(np.mean(self.standard_errors[top] / self.scores[top])) if len(top) else 0.0
+
+
+def source_dependencies(csr: CsrGraph, sources: np.ndarray):
+    """(len(sources) × edge_bound) edge dependencies of Brandes' algorithm, one row per source.
+
+    All the sources are searched together: node v of the b-th search is the flat id
+    b * node_bound + v, so each BFS level and each step of the backward accumulation is a
+    handful of numpy calls over every search at once.
+    """
+    n, edges = csr.node_bound, csr.edge_bound
+    batch = len(sources)
+    base = np.arange(batch, dtype=np.int64) * n
+    distance = np.full(batch * n, -1, dtype=np.int32)
+    sigma = np.zeros(batch * n)
+    frontier = base + sources
+    distance[frontier] = 0
+    sigma[frontier] = 1
+
+    levels = []
+    level = 0
+    while len(frontier):
+        search, node = np.divmod(frontier, n)
+        degrees = csr.offsets[node + 1] - csr.offsets[node]
+        starts = np.repeat(csr.offsets[node] - np.cumsum(degrees) + degrees, degrees)
+        entries = starts + np.arange(int(degrees.sum()))
+        parents = np.repeat(frontier, degrees)
+        searches = np.repeat(search, degrees)
+        children = searches * n + csr.neighbors[entries]
+
+        distance[children[distance[children] < 0]] = level + 1
+        # Shortest path DAG edges into the next level
+        forward = distance[children] == level + 1
+        parents, children = parents[forward], children[forward]
+        edge_keys = searches[forward] * edges + csr.edge_ids[entries[forward]]
+        sigma += np.bincount(children, weights=sigma[parents], minlength=batch * n)
+        levels.append((parents, children, edge_keys))
+        frontier = np.unique(children)
+        level += 1
+
+    delta = np.zeros(batch * n)
+    dependencies = np.zeros(batch * edges)
+    for parents, children, edge_keys in reversed(levels):
+        flow = sigma[parents] / sigma[children] * (1 + delta[children])
+        dependencies += np.bincount(edge_keys, weights=flow, minlength=batch * edges)
+        delta += np.bincount(parents, weights=flow, minlength=batch * n)
+    return dependencies.reshape(batch, edges)
+
+
+def sample_edge_betweenness(csr: CsrGraph, samples: int = None, time_budget: float = None, seed=None,
+                            batch_entries: int = BATCH_ENTRIES):
+    """Estimate edge betweenness from sampled BFS sources, drawn without replacement.
+
+    With samples, exactly that many sources are searched (all the nodes at most). Otherwise
+    sources are added in batches until time_budget seconds have been spent, at least
+    MIN_SAMPLES of them; the batch size follows the measured time per source so the budget
+    is not overrun by more than one small batch. Without either, every node is a source and
+    the result is exact.
+    """
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    nodes = len(csr.nodes)
+    sources = rng.permutation(csr.nodes)
+    limit = nodes if samples is None else min(samples, nodes)
+    largest_batch = max(1, batch_entries // max(1, csr.edge_bound + csr.node_bound))
+
+    total = np.zeros(csr.edge_bound)
+    squares = np.zeros(csr.edge_bound)
+    budgeted = time_budget is not None and samples is None
+    done = 0
+    batch = 1 if budgeted else largest_batch
+    while done < limit:
+        if budgeted and done >= MIN_SAMPLES:
+            elapsed = time.perf_counter() - start
+            if elapsed >= time_budget:
+                break
+            # Grow the batch, but only up to the sources that still fit in the budget at the rate seen so far
+            batch = max(1, min(batch * 2, int((time_budget - elapsed) / (elapsed / done))))
+        batch = min(batch, largest_batch, limit - done)
+        dependencies = source_dependencies(csr, sources[done:done + batch])
+        total += dependencies.sum(axis=0)
+        squares += np.square(dependencies).sum(axis=0)
+        done += batch
+
+    # Sources are a uniform sample of the nodes; like networkit, a pair counts from both of its ends
+    scale = nodes / done
+    if done > 1:
+        mean = total / done
+        variance = np.maximum(squares / done - np.square(mean), 0) * done / (done - 1)
+        # Finite population correction: sampling every node leaves no error
+        standard_errors = scale * np.sqrt(variance * done * (1 - done / nodes))
+    else:
+        standard_errors = np.full(csr.edge_bound, math.inf)
+    return SampledBetweenness(total * scale, standard_errors, done, nodes, time.perf_counter() - start)
@@ -0,0 +1,65 @@
+from multiprocessing import shared_memory
+import numpy as np
+from csr_graph import CsrGraph
+
+
+CSR_FIELDS = ("offsets", "neighbors", "edge_ids", "edge_u", "edge_v", "nodes")
+
+
+
+class SharedCsr:
+    """CSR arrays and an int64 edge-score accumulator living in shared memory segments.
+
+    The owner process creates the segments once; ``spec`` is a small picklable
+    description that worker processes pass to ``attach_csr`` to map the very same
+    memory, so a single copy of the graph exists whatever the number of workers.
+    """
+    spec: dict
+    csr: CsrGraph
+    counts: np.ndarray
+
+    def __init__(self, csr: CsrGraph):
+        self._segments = []
+        self.spec = {}
+        arrays = {field: getattr(csr, field) for field in CSR_FIELDS}
+        arrays["counts"] = np.zeros(csr.edge_bound, dtype=np.int64)
+
+        for name, array in arrays.items():
+            segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            view = np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)
+            view[...] = array
+            self._segments.append(segment)
+            self.spec[name] = (segment.name, array.shape, array.dtype.str)
+
+        self.csr, self.counts = _views(self._segments, self.spec)
+
+    def close(self):
+        self.csr = self.counts = None
+        for segment in self._segments:
+            segment.close()
+            segment.unlink()
+        self._segments = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def attach_csr(spec: dict):
+    """Map the segments described by spec; returns (segments, csr, counts) views."""
+    segments = []
+    for segment_name, _, _ in spec.values():
+        # Pool workers share the owner's resource tracker, so attaching does not take ownership
+        segments.append(shared_memory.SharedMemory(name=segment_name))
+    csr, counts = _views(segments, spec)
+    return segments, csr, counts
+
+
+def _views(segments, spec: dict):
+    arrays = {}
+    for segment, (name, (_, shape, dtype)) in zip(segments, spec.items()):
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf)
+    counts = arrays.pop("counts")
+    return CsrGraph(**arrays), counts
@@ -0,0 +1,75 @@
+import numpy as np
+
+
+SAMPLE_CHUNK = 8192  # Start nodes drawn and turned into Python ints at once by iter_sample
+
+
+
+class UniformSampler:
+    """Uniform start node sampler; ``sample(k)`` draws k nodes in one vectorized call."""
+    nodes: np.ndarray
+
+    def __init__(self, nodes):
+        self.nodes = np.asarray(nodes, dtype=np.int64)
+
+    def sample(self, k: int, rng=None):
+        rng = np.random.default_rng(rng)
+        return self.nodes[rng.integers(len(self.nodes), size=k)]
+
+    def iter_sample(self, k: int, rng=None, chunk: int = SAMPLE_CHUNK):
+        # k start nodes as Python ints, drawn chunk at a time so that k walks never hold k draws
+        rng = np.random.default_rng(rng)
+        for done in range(0, k, chunk):
+            yield from self.sample(min(chunk, k - done), rng).tolist()
+
+
+class AliasSampler(UniformSampler):
+    """Walker/Vose alias table: O(n) construction, O(1) per draw, for any non-negative weights."""
+    probability: np.ndarray
+    alias: np.ndarray
+
+    def __init__(self, nodes, weights):
+        super(AliasSampler, self).__init__(nodes)
+        weights = np.asarray(weights, dtype=np.float64)
+        n = len(weights)
+        if n == 0 or weights.sum() <= 0:
+            raise ValueError("alias sampler needs at least one positive weight")
+
+        scaled = (weights * (n / weights.sum())).tolist()
+        probability = [1.0] * n
+        alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+        while small and large:
+            less, more = small.pop(), large.pop()
+            probability[less] = scaled[less]
+            alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+        # Whatever is left over equals 1 up to rounding and keeps probability 1
+
+        self.probability = np.asarray(probability)
+        self.alias = np.asarray(alias, dtype=np.int64)
+
+    def sample(self, k: int, rng=None):
+        rng = np.random.default_rng(rng)
+        column = rng.integers(len(self.nodes), size=k)
+        keep = rng.random(k) < self.probability[column]
+        return self.nodes[np.where(keep, column, self.alias[column])]
+
+
+def uniform_start_sampler(G):
+    return UniformSampler(np.fromiter(G.iterNodes(), dtype=np.int64, count=G.numberOfNodes()))
+
+
+def degree_start_sampler(G, normalized_degrees: dict = None):
+    # normalized_degrees as returned by assign_normalized_degree; plain degrees otherwise
+    if normalized_degrees is None:
+        normalized_degrees = {node: G.degree(node) for node in G.iterNodes()}
+    nodes = np.fromiter(normalized_degrees.keys(), dtype=np.int64, count=len(normalized_degrees))
+    weights = np.fromiter(normalized_degrees.values(), dtype=np.float64, count=len(normalized_degrees))
+    return AliasSampler(nodes, weights)
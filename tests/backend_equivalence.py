@@ -0,0 +1,84 @@
+import random
+import networkit as nk
+import numpy as np
+
+from csr_graph import csr_from_networkit
+from erw_kpath_final import ERW_KPath
+from werw_kpath_final import WERW_KPath
+from erw_kpath_csr import ERW_KPath_csr
+from werw_kpath_csr import WERW_KPath_csr
+from walk_kernels_numba import NUMBA_AVAILABLE, WERW_KPath_numba
+
+
+KAPPA = 20
+RHO = 2000
+RUNS = 10  # Seeds per backend; WERW reinforces its own walks, so single runs are far apart
+Z_LIMIT = 5.0  # Largest per-edge z-score of a backend mean against the dict engine mean
+
+
+
+def graph_with_self_loops(seed=7):
+    # Small Barabasi-Albert graph plus self-loops, which walkers never take but which count in degrees
+    nk.setSeed(seed, False)
+    G = nk.generators.BarabasiAlbertGenerator(3, 40).generate()
+    for node in (0, 5, 17):
+        G.addEdge(node, node)
+    return G
+
+
+def dict_to_array(csr, omega: dict):
+    return np.array([omega[(u, v)] for u, v in zip(csr.edge_u.tolist(), csr.edge_v.tolist())])
+
+
+def repeat(run):
+    # (RUNS x m) weights of run(seed) over the seeds; the random module is seeded for the dict engines
+    weights = []
+    for seed in range(RUNS):
+        random.seed(seed)
+        weights.append(run(seed))
+    return np.array(weights)
+
+
+def compare(name: str, reference: np.ndarray, weights: np.ndarray, loops: np.ndarray = None):
+    spread = np.sqrt((reference.var(axis=0, ddof=1) + weights.var(axis=0, ddof=1)) / RUNS)
+    difference = np.abs(weights.mean(axis=0) - reference.mean(axis=0))
+    z = np.divide(difference, spread, out=np.where(difference > 0, np.inf, 0.0), where=spread > 0)
+    if loops is None:
+        print(f"{name}: max z-score {float(z.max()):.2f}")
+        return bool(z.max() <= Z_LIMIT)
+    loops_unchanged = bool(np.all(weights[:, loops] == reference[:, loops]))
+    print(f"{name}: max z-score {float(z.max()):.2f}, self-loops untouched: {loops_unchanged}")
+    return bool(z.max() <= Z_LIMIT) and loops_unchanged
+
+
+def main():
+    G = graph_with_self_loops()
+    csr = csr_from_networkit(G)
+    loops = np.flatnonzero(csr.edge_u == csr.edge_v)
+    degrees = np.array([G.degree(node) for node in range(G.upperNodeIdBound())])
+    passed = np.array_equal(csr.degrees(), degrees)
+    print(f"CSR degrees equal networkit degrees: {passed}")
+
+    beta = 1.0 / G.numberOfEdges()
+    erw = repeat(lambda seed: dict_to_array(csr, ERW_KPath(G, KAPPA, RHO, beta)))
+    erw_runs = {"ERW csr": dict(), "ERW batch": dict(batch_size=256)}
+    if NUMBA_AVAILABLE:
+        erw_runs["ERW numba"] = dict(use_numba=True)
+    for name, options in erw_runs.items():
+        weights = repeat(lambda seed: ERW_KPath_csr(csr, KAPPA, RHO, beta, seed=seed, **options))
+        passed &= compare(name, erw, weights, loops)
+
+    werw = repeat(lambda seed: dict_to_array(csr, WERW_KPath(G, KAPPA, RHO)))
+    werw_runs = {"WERW csr": lambda seed: WERW_KPath_csr(csr, KAPPA, RHO, seed=seed),
+                 "WERW csr (Fenwick rows)": lambda seed: WERW_KPath_csr(csr, KAPPA, RHO, seed=seed, hub_threshold=0)}
+    if NUMBA_AVAILABLE:
+        werw_runs["WERW numba"] = lambda seed: WERW_KPath_numba(csr, KAPPA, RHO, seed=seed)
+    for name, run in werw_runs.items():
+        passed &= compare(name, werw, repeat(run), loops)
+
+    print("All backends agree with the dict engine" if passed else "Backends DIFFER from the dict engine")
+    return passed
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
@@ -0,0 +1,78 @@
+import random
+from collections import Counter
+import networkit as nk
+import numpy as np
+
+from erw_kpath_final import ERW_KPath
+from erw_kpath_dynamic import DynamicErw
+from backend_equivalence import RUNS, compare
+
+
+KAPPA = 10
+CHANGES = 15  # Edges removed and edges inserted by the batch
+
+
+
+def base_graph(seed=11):
+    nk.setSeed(seed, False)
+    return nk.generators.BarabasiAlbertGenerator(3, 60).generate()
+
+
+def change_batch(G, seed=5):
+    # CHANGES existing edges to remove and CHANGES missing ones to insert, between existing nodes
+    rng = random.Random(seed)
+    removed = rng.sample(sorted((min(u, v), max(u, v)) for u, v in G.iterEdges()), CHANGES)
+    inserted = set()
+    while len(inserted) < CHANGES:
+        u, v = sorted(rng.sample(range(G.numberOfNodes()), 2))
+        if not G.hasEdge(u, v):
+            inserted.add((u, v))
+    return removed, sorted(inserted)
+
+
+def apply_batch(G, removed, inserted):
+    for u, v in removed:
+        G.removeEdge(u, v)
+    for u, v in inserted:
+        G.addEdge(u, v)
+
+
+def consistent(engine: DynamicErw):
+    # hops recounted from the stored paths, every hop an edge of the current graph, rho = m
+    recount = Counter((min(a, b), max(a, b)) for path in engine.paths for a, b in zip(path, path[1:]))
+    return (recount == Counter(dict(engine.hops)) and all(engine.G.hasEdge(u, v) for u, v in recount)
+            and len(engine.paths) == engine.G.numberOfEdges())
+
+
+def weights(omega: dict, keys: list):
+    return np.array([omega[key] for key in keys])
+
+
+def main():
+    removed, inserted = change_batch(base_graph())
+    updated = base_graph()
+    apply_batch(updated, removed, inserted)
+    keys = sorted((min(u, v), max(u, v)) for u, v in updated.iterEdges())
+    beta = 1.0 / updated.numberOfEdges()
+
+    dynamic, fresh = [], []
+    passed = True
+    for seed in range(RUNS):
+        G = base_graph()
+        engine = DynamicErw(G, KAPPA, seed=seed)
+        apply_batch(G, removed, inserted)
+        engine.update(removed + inserted)
+        passed &= consistent(engine)
+        dynamic.append(weights(engine.omega(), keys))
+
+        random.seed(seed)
+        fresh.append(weights(ERW_KPath(updated, KAPPA, updated.numberOfEdges(), beta), keys))
+    print(f"hops match the stored paths and the updated graph: {passed}")
+
+    passed &= compare("DynamicErw after the batch", np.array(fresh), np.array(dynamic))
+    print("DynamicErw agrees with a fresh ERW_KPath run" if passed else "DynamicErw DIFFERS from a fresh ERW_KPath run")
+    return passed
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
@@ -0,0 +1,87 @@
+import os
+import random
+import tempfile
+import networkit as nk
+
+from graph_loader import load_graph
+
+
+WORKERS = 3
+CHUNK_BYTES = 64  # Tiny chunks, so every file is split across several parse workers
+
+
+
+def two_columns(rng: random.Random, n=30, m=80):
+    return "".join(f"{rng.randrange(n)} {rng.randrange(n)}\n" for _ in range(m))
+
+
+def weighted(rng: random.Random):
+    # The format StdGraphGenerator and graphs_generators/weight.py write: u v 1
+    return "".join(f"{line} 1\n" for line in two_columns(rng).splitlines())
+
+
+def commented(rng: random.Random):
+    lines = two_columns(rng).splitlines()
+    lines.insert(0, "# u v")
+    lines.insert(len(lines) // 2, "# 7 8 9")
+    return "\n".join(lines)  # No final newline
+
+
+def duplicated(rng: random.Random):
+    lines = two_columns(rng, m=40).splitlines()
+    lines += [" ".join(reversed(line.split())) for line in lines[:10]] + lines[10:20]
+    return "\n".join(lines) + "\n"
+
+
+def generated(rng: random.Random):
+    # A weighted graph written by EdgeListWriter itself, as the doubling generators do
+    nk.setSeed(rng.randrange(1000), False)
+    G = nk.Graph(nk.generators.ErdosRenyiGenerator(30, 0.2).generate(), weighted=True)
+    path = os.path.join(tempfile.mkdtemp(), "generated.txt")
+    nk.graphio.EdgeListWriter(separator=" ", firstNode=0).write(G, path)
+    with open(path) as file:
+        return file.read()
+
+
+def edge_set(G):
+    return sorted((min(u, v), max(u, v)) for u, v in G.iterEdges())
+
+
+def same_graph(path: str):
+    reader = nk.graphio.EdgeListReader(separator=" ", firstNode=0, continuous=False, directed=False)
+    expected = reader.read(path)
+    loaded = load_graph(path, workers=WORKERS, chunk_bytes=CHUNK_BYTES, cache=False)
+    return (loaded.numberOfNodes() == expected.numberOfNodes() and loaded.numberOfEdges() == expected.numberOfEdges()
+            and edge_set(loaded) == edge_set(expected))
+
+
+def main():
+    rng = random.Random(3)
+    passed = True
+    directory = tempfile.mkdtemp()
+    for name, build in (("two columns", two_columns), ("weight column", weighted), ("comments", commented),
+                        ("duplicate edges", duplicated), ("EdgeListWriter weighted", generated)):
+        path = os.path.join(directory, name.replace(" ", "_") + ".txt")
+        with open(path, "w") as file:
+            file.write(build(rng))
+        same = same_graph(path)
+        print(f"{name}: load_graph equals EdgeListReader: {same}")
+        passed &= same
+
+    path = os.path.join(directory, "single.txt")
+    with open(path, "w") as file:
+        file.write("0 1\n2\n1 2\n")
+    try:
+        load_graph(path, cache=False)
+        rejected = False
+    except ValueError:
+        rejected = True
+    print(f"line with one node id rejected: {rejected}")
+    passed &= rejected
+
+    print("load_graph agrees with EdgeListReader" if passed else "load_graph DIFFERS from EdgeListReader")
+    return passed
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
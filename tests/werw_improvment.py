@@ -3,6 +3,7 @@ import time
 import networkit as nk
 from networkit import Graph
 from csv_writer import CsvWriter
+from walk_buffers import WalkBuffers
 
 def assign_normalized_degree(G: Graph):
     start_time = time.time()
@@ -38,11 +39,12 @@ def WERW_KPath(G: Graph, kappa: int, rho: int, beta: float):
 
     normalized_degrees = assign_normalized_degree(G)
     omega = initialize_weights(G)
+    buffers = WalkBuffers(G.upperNodeIdBound(), kappa)
 
     for i in range(rho):
         vn = random.choices(list(G.iterNodes()), weights=list(normalized_degrees.values()), k=1)[0]
 
-        MessagePropagation(G, vn, kappa, omega, beta)
+        MessagePropagation(G, vn, kappa, omega, beta, buffers)
 
     end_time = time.time()
     print(f"WERW_KPath took {end_time - start_time:.4f} seconds")
@@ -62,13 +64,15 @@ def calculate_probability(G: Graph, current: int, neighbor: int, omega: dict, un
     # Calculate and return the probability
     return edge_weight / denominator
 
-def MessagePropagation(G: Graph, start: int, kappa: int, omega: dict, beta: float):
+def MessagePropagation(G: Graph, start: int, kappa: int, omega: dict, beta: float, buffers: WalkBuffers):
     start_time = time.time()
 
-    path = [start]
-    for _ in range(kappa - 1):  # kappa - 1 perché il nodo di partenza è già nel cammino
-        current = path[-1]
-        unvisited_neighbors = [v for v in G.iterNeighbors(path[-1]) if v not in path]
+    epoch = buffers.new_walk(start)
+    marks, path, unvisited_neighbors = buffers.marks, buffers.path, buffers.candidates
+    for step in range(1, kappa):  # il nodo di partenza è già nel cammino
+        current = path[step - 1]
+        unvisited_neighbors.clear()
+        unvisited_neighbors.extend(v for v in G.iterNeighbors(current) if marks[v] != epoch)
         if not unvisited_neighbors:
             break
 
@@ -80,8 +84,9 @@ def MessagePropagation(G: Graph, start: int, kappa: int, omega: dict, beta: floa
         # Choose next node
         next_node = random.choices(unvisited_neighbors, weights=edge_probs, k=1)[0]
 
-        update_edge_weight(omega, path[-1], next_node, beta)
-        path.append(next_node)
+        update_edge_weight(omega, current, next_node, beta)
+        marks[next_node] = epoch
+        path[step] = next_node
 
     end_time = time.time()
     print(f"MessagePropagation took {end_time - start_time:.4f} seconds")
@@ -0,0 +1,129 @@
+import gc
+import math
+import time
+import statistics
+
+
+# Two-sided 95% Student t critical values by degrees of freedom; 1.96 past the table
+T_TABLE_95 = (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+              2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+              2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042)
+
+DEFAULT_MIN_REPETITIONS = 3
+DEFAULT_MAX_REPETITIONS = 30
+DEFAULT_TARGET_CI = 0.05  # Half-width of the 95% CI relative to the mean
+
+
+
+def t_critical(df: int):
+    return T_TABLE_95[df - 1] if df <= len(T_TABLE_95) else 1.96
+
+
+def confidence_interval(samples):
+    # 95% CI of the mean; a single sample gives a zero-width interval
+    mean = statistics.fmean(samples)
+    if len(samples) < 2:
+        return mean, mean
+    half_width = t_critical(len(samples) - 1) * statistics.stdev(samples) / math.sqrt(len(samples))
+    return mean - half_width, mean + half_width
+
+
+def summarize(samples):
+    """Median, IQR and 95% CI of the mean of a list of timings (seconds)."""
+    if len(samples) > 1:
+        q1, median, q3 = statistics.quantiles(samples, n=4, method="inclusive")
+    else:
+        q1 = median = q3 = samples[0]
+    ci_low, ci_high = confidence_interval(samples)
+    return dict(repetitions=len(samples), median=median, iqr=q3 - q1, ci_low=ci_low, ci_high=ci_high)
+
+
+class TimingResult:
+    """Wall clock (perf_counter_ns) and CPU (process_time_ns) seconds of every timed run."""
+    wall: list
+    cpu: list
+
+    def __init__(self):
+        self.wall = []
+        self.cpu = []
+
+    def relative_ci(self):
+        if len(self.wall) < 2:
+            return math.inf
+        ci_low, ci_high = confidence_interval(self.wall)
+        mean = statistics.fmean(self.wall)
+        return (ci_high - ci_low) / 2 / mean if mean > 0 else 0.0
+
+    def summary(self):
+        return summarize(self.wall)
+
+
+def measure(function, warmup: int = 1, min_repetitions: int = DEFAULT_MIN_REPETITIONS,
+            max_repetitions: int = DEFAULT_MAX_REPETITIONS, target_ci: float = DEFAULT_TARGET_CI,
+            time_budget: float = None, on_run=None, before_run=None):
+    """Time function() until its mean is known to within target_ci, or the budget runs out.
+
+    After warmup untimed calls, timed calls are repeated at least min_repetitions and at most
+    max_repetitions times, stopping early once the relative half-width of the 95% CI of the mean
+    is below target_ci or time_budget seconds have been spent on timed calls. The garbage
+    collector is disabled during the timed calls and run in between them, so no collection
+    lands inside a measurement. before_run() and on_run(index, wall, cpu, result) are called
+    before and after each timed run, outside the timed section.
+    """
+    for _ in range(warmup):
+        function()
+
+    timing = TimingResult()
+    gc_enabled = gc.isenabled()
+    try:
+        while len(timing.wall) < max_repetitions:
+            if before_run is not None:
+                before_run()
+            gc.collect()
+            gc.disable()
+            wall_start, cpu_start = time.perf_counter_ns(), time.process_time_ns()
+            result = function()
+            wall, cpu = time.perf_counter_ns() - wall_start, time.process_time_ns() - cpu_start
+            if gc_enabled:
+                gc.enable()
+
+            timing.wall.append(wall / 1e9)
+            timing.cpu.append(cpu / 1e9)
+            if on_run is not None:
+                on_run(len(timing.wall) - 1, wall / 1e9, cpu / 1e9, result)
+            del result
+
+            if len(timing.wall) < min_repetitions:
+                continue
+            if timing.relative_ci() <= target_ci:
+                break
+            if time_budget is not None and sum(timing.wall) >= time_budget:
+                break
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return timing
+
+
+def fit_power_law(sizes, times):
+    """Least squares fit of log(time) = exponent * log(size) + log(constant).
+
+    Returns the empirical scaling exponent with its 95% confidence bounds (infinite with fewer
+    than three points) and the constant, so that time ~ constant * size ** exponent.
+    """
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(seconds) for seconds in times]
+    if len(xs) < 2:
+        raise ValueError("fitting a scaling exponent needs at least two graph sizes")
+    x_mean, y_mean = statistics.fmean(xs), statistics.fmean(ys)
+    sxx = sum((x - x_mean) ** 2 for x in xs)
+    exponent = sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys)) / sxx
+    intercept = y_mean - exponent * x_mean
+
+    if len(xs) < 3:
+        low, high = -math.inf, math.inf
+    else:
+        residuals = sum((y - intercept - exponent * x) ** 2 for x, y in zip(xs, ys))
+        half_width = t_critical(len(xs) - 2) * math.sqrt(residuals / (len(xs) - 2) / sxx)
+        low, high = exponent - half_width, exponent + half_width
+    return dict(exponent=exponent, low=low, high=high, constant=math.exp(intercept))
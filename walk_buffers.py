@@ -0,0 +1,35 @@
+import numpy as np
+
+
+EPOCH_LIMIT = np.iinfo(np.int32).max
+
+
+
+class WalkBuffers:
+    """Scratch space reused by all the walks of one run.
+
+    ``stamps[v] == epoch`` exactly when ``v`` is on the current walk, so starting a new walk
+    only bumps the epoch: membership tests are O(1) and nothing is allocated per walk.
+    ``marks`` is a memoryview of ``stamps`` for fast scalar access from Python loops; ``path``
+    holds the nodes of the current walk and ``candidates`` is refilled at every step.
+    """
+    stamps: np.ndarray
+    epoch: int
+    path: list
+    candidates: list
+
+    def __init__(self, node_bound: int, kappa: int):
+        self.stamps = np.zeros(node_bound, dtype=np.int32)
+        self.marks = memoryview(self.stamps)
+        self.epoch = 0
+        self.path = [0] * kappa
+        self.candidates = []
+
+    def new_walk(self, start: int):
+        self.epoch += 1
+        if self.epoch == EPOCH_LIMIT:
+            self.stamps[:] = 0
+            self.epoch = 1
+        self.marks[start] = self.epoch
+        self.path[0] = start
+        return self.epoch
@@ -0,0 +1,140 @@
+import numpy as np
+from csr_graph import CsrGraph
+from start_sampler import AliasSampler
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        return lambda function: function
+
+    prange = range
+
+
+# Compiled kernels are cached next to this module (__pycache__), so only the first run pays the JIT cost
+
+
+
+@njit(cache=True, inline="always")
+def _on_path(paths, walk, length, node):
+    for i in range(length):
+        if paths[walk, i] == node:
+            return True
+    return False
+
+
+@njit(parallel=True, cache=True)
+def erw_walk_kernel(offsets, neighbors, edge_ids, starts, uniforms, kappa, paths, trace):
+    # Same hop rule as erw_kpath_csr.MessagePropagation_csr: uniforms[w, step] picks among the
+    # unvisited row entries in row order, so both walkers agree for the same random draws
+    for walk in prange(len(starts)):
+        current = starts[walk]
+        paths[walk, 0] = current
+
+        for step in range(kappa - 1):
+            low, high = offsets[current], offsets[current + 1]
+            free = 0
+            for i in range(low, high):
+                if not _on_path(paths, walk, step + 1, neighbors[i]):
+                    free += 1
+            if free == 0:
+                break
+
+            pick = int(uniforms[walk, step] * free)
+            position = low
+            for i in range(low, high):
+                if not _on_path(paths, walk, step + 1, neighbors[i]):
+                    if pick == 0:
+                        position = i
+                        break
+                    pick -= 1
+
+            trace[walk, step] = edge_ids[position]
+            current = neighbors[position]
+            paths[walk, step + 1] = current
+
+
+@njit(cache=True)
+def werw_walk_kernel(offsets, neighbors, edge_ids, starts, kappa, omega, stamps, epoch, seed):
+    # Continues from the given visited epoch and returns the last one used
+    np.random.seed(seed)
+    path = np.empty(kappa, dtype=np.int64)
+
+    for walk in range(len(starts)):
+        epoch += 1
+        if epoch == np.iinfo(np.int32).max:
+            stamps[:] = 0
+            epoch = 1
+        path[0] = starts[walk]
+        stamps[starts[walk]] = epoch
+
+        for length in range(1, kappa):
+            current = path[length - 1]
+            low, high = offsets[current], offsets[current + 1]
+            total_weight = 0
+            for i in range(low, high):
+                if stamps[neighbors[i]] != epoch:
+                    total_weight += omega[edge_ids[i]]
+            if total_weight == 0:
+                break
+
+            target = np.random.random() * total_weight
+            position = -1
+            for i in range(low, high):
+                if stamps[neighbors[i]] == epoch:
+                    continue
+                position = i
+                target -= omega[edge_ids[i]]
+                if target < 0:
+                    break
+
+            omega[edge_ids[position]] += 1
+            path[length] = neighbors[position]
+            stamps[neighbors[position]] = epoch
+
+    return epoch
+
+
+def erw_walk_trace(csr: CsrGraph, starts: np.ndarray, uniforms: np.ndarray, kappa: int):
+    # Edge ids of all the hops of one chunk of ERW walks
+    paths = np.empty((len(starts), kappa), dtype=np.int64)
+    trace = np.full((len(starts), kappa - 1), -1, dtype=np.int64)
+    erw_walk_kernel(csr.offsets, csr.neighbors, csr.edge_ids, starts, uniforms, kappa, paths, trace)
+    return trace[trace >= 0]
+
+
+class WerwNumbaWalker:
+    """WERW state over the CSR arrays advanced by the compiled kernel, a few walks at a time."""
+    walks: int
+
+    def __init__(self, csr: CsrGraph, kappa: int, seed=None):
+        self.csr = csr
+        self.kappa = kappa
+        self.rng = np.random.default_rng(seed)
+        self.start_sampler = AliasSampler(csr.nodes, csr.degrees()[csr.nodes])
+        self.counts = (csr.edge_u >= 0).astype(np.int64)
+        self.stamps = np.zeros(csr.node_bound, dtype=np.int32)
+        self.epoch = 0
+        self.walks = 0
+
+    def advance(self, walks: int):
+        start_nodes = self.start_sampler.sample(walks, self.rng)
+        self.epoch = werw_walk_kernel(self.csr.offsets, self.csr.neighbors, self.csr.edge_ids, start_nodes,
+                                      self.kappa, self.counts, self.stamps, self.epoch,
+                                      int(self.rng.integers(2 ** 31)))
+        self.walks += walks
+
+    def scores(self):
+        return self.counts
+
+    def omega(self):
+        return self.counts / self.walks
+
+
+def WERW_KPath_numba(csr: CsrGraph, kappa: int, rho: int, seed=None):
+    walker = WerwNumbaWalker(csr, kappa, seed)
+    walker.advance(rho)
+    return walker.omega()
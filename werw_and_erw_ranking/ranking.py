@@ -1,8 +1,9 @@
 import os
 from datetime import datetime
-import networkit as nk
-from tests.werw_test import werw_centrality_algorithm
+from werw_kpath_final import werw_centrality_algorithm
 from erw_kpath_final import erw_centrality_algorithm
+from graph_loader import load_graph
+from rank_metrics import aligned_scores, compare_rankings
 import csv
 import pandas as pd
 import matplotlib.pyplot as plt
@@ -23,15 +24,15 @@ def read_results(filename):
     return results
 
 
-def werw_results(G, output_file):
-    results = werw_centrality_algorithm(G)
+def werw_results(G, output_file, top_k=None):
+    results = werw_centrality_algorithm(G, top_k=top_k)
     edge_centralities = {(u, v): centrality for u, v, centrality in results}
     save_results(G, edge_centralities, output_file)
     return edge_centralities
 
 
-def erw_results(G, output_file):
-    results = erw_centrality_algorithm(G)
+def erw_results(G, output_file, top_k=None):
+    results = erw_centrality_algorithm(G, top_k=top_k)
     edge_centralities = {(u, v): centrality for u, v, centrality in results}
     save_results(G, edge_centralities, output_file)
     return edge_centralities
@@ -45,18 +46,11 @@ def save_results(G, edge_centralities, output_file):
 
 
 def calculate_edge_distances(results1, results2):
+    # Positions follow the insertion order of the results; a missing edge takes its index in the sorted union
     edges = sorted(set(results1.keys()) | set(results2.keys()))
-    distances = []
-    for i, edge in enumerate(edges):
-        pos1 = i
-        pos2 = i
-        if edge in results1:
-            pos1 = list(results1.keys()).index(edge)
-        if edge in results2:
-            pos2 = list(results2.keys()).index(edge)
-        distance = abs(pos1 - pos2)
-        distances.append((*edge, distance))
-    return distances
+    positions1 = {edge: position for position, edge in enumerate(results1)}
+    positions2 = {edge: position for position, edge in enumerate(results2)}
+    return [(*edge, abs(positions1.get(edge, i) - positions2.get(edge, i))) for i, edge in enumerate(edges)]
 
 
 def calculate_average_distance(distances):
@@ -67,42 +61,51 @@ def calculate_average_distance(distances):
     return average_distance
 
 
-def run_full_test(test_number, directory):
+def run_full_test(test_number, directory, top_k=None):
+    # With top_k only the k most central edges of each run are ranked, the others are saved as 0
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_directory = os.path.join("werw_and_erw_ranking/results_albert", f"test_results_{timestamp}_k=20")
     os.makedirs(output_directory, exist_ok=True)
 
-    reader = nk.graphio.EdgeListReader(separator=" ", firstNode=0, continuous=False, directed=False)
-    G = reader.read("graph/albert/Albert(n=20480, m=102380).txt")
+    G = load_graph("graph/albert/Albert(n=20480, m=102380).txt")
 
     total_average_distances = {
         "werw_erw": 0
     }
+    total_agreement = {"spearman": 0, "kendall": 0, "top_k_overlap": 0}
 
     csv_output_file = os.path.join(output_directory, "distance_results.csv")
 
     with open(csv_output_file, 'w', newline='') as csvfile:
         csvwriter = csv.writer(csvfile)
-        csvwriter.writerow(['Test', 'WERW-ERW'])
+        csvwriter.writerow(['Test', 'WERW-ERW', 'Spearman', 'Kendall', 'Top-k overlap'])
 
     for i in range(1, test_number + 1):
         erw_output_file = get_file_name("erw_results", "txt", output_directory, i)
         werw_output_file = get_file_name("werw_results", "txt", output_directory, i)
 
-        werw_res = werw_results(G, werw_output_file)
-        erw_res = erw_results(G, erw_output_file)
+        werw_res = werw_results(G, werw_output_file, top_k)
+        erw_res = erw_results(G, erw_output_file, top_k)
 
         distances_werw_erw = calculate_edge_distances(werw_res, erw_res)
 
         average_distance_werw_erw = calculate_average_distance(distances_werw_erw)
 
+        _, (werw_scores, erw_scores) = aligned_scores(werw_res, erw_res)
+        agreement = compare_rankings(werw_scores, erw_scores)
+
         total_average_distances["werw_erw"] += average_distance_werw_erw
+        for measure in total_agreement:
+            total_agreement[measure] += agreement[measure]
 
-        print(f"Test {i} completed. Average distance WERW-ERW: {average_distance_werw_erw}")
+        print(f"Test {i} completed. Average distance WERW-ERW: {average_distance_werw_erw}, "
+              f"Spearman: {agreement['spearman']}, Kendall: {agreement['kendall']}, "
+              f"Top-k overlap: {agreement['top_k_overlap']}")
 
         with open(csv_output_file, 'a', newline='') as csvfile:
             csvwriter = csv.writer(csvfile)
-            csvwriter.writerow([f"Test {i}", average_distance_werw_erw])
+            csvwriter.writerow([f"Test {i}", average_distance_werw_erw,
+                                agreement["spearman"], agreement["kendall"], agreement["top_k_overlap"]])
 
     overall_average_distances = {
         comparison: total / test_number
@@ -112,7 +115,8 @@ def run_full_test(test_number, directory):
     with open(csv_output_file, 'a', newline='') as csvfile:
         csvwriter = csv.writer(csvfile)
         csvwriter.writerow([])
-        csvwriter.writerow(['Overall Average', overall_average_distances["werw_erw"]])
+        csvwriter.writerow(['Overall Average', overall_average_distances["werw_erw"],
+                            *(total / test_number for total in total_agreement.values())])
 
     show_csv_as_table(csv_output_file, "Test results: k=20, n=20480, m=102380", output_directory)
 
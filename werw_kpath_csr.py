@@ -0,0 +1,179 @@
+import random
+from array import array
+from bisect import bisect_left
+import numpy as np
+from csr_graph import CsrGraph
+from start_sampler import AliasSampler
+from walk_buffers import WalkBuffers
+from convergence import default_checkpoint, run_until_stable
+
+
+DEFAULT_HUB_THRESHOLD = 64  # Nodes with a larger degree sample their next hop from a Fenwick tree
+MAX_REJECTIONS = 64  # Fenwick draws landing on visited neighbors before falling back to a row scan
+
+
+
+class FenwickRows:
+    """Fenwick trees over the CSR rows of the hub nodes.
+
+    All trees live in one flat list aligned with the CSR entries: the tree of the row
+    starting at ``low`` with ``degree`` entries uses ``tree[low:low + degree]``. Both the
+    prefix-sum search and the point update cost O(log degree).
+    """
+    tree: list
+
+    def __init__(self, offsets: list, entry_weights: list, hubs):
+        self.tree = [0] * len(entry_weights)
+        for node in hubs:
+            low, degree = offsets[node], offsets[node + 1] - offsets[node]
+            for i in range(1, degree + 1):
+                self.tree[low + i - 1] += entry_weights[low + i - 1]
+                parent = i + (i & -i)
+                if parent <= degree:
+                    self.tree[low + parent - 1] += self.tree[low + i - 1]
+
+    def add(self, low: int, degree: int, index: int, delta):
+        i = index + 1
+        while i <= degree:
+            self.tree[low + i - 1] += delta
+            i += i & -i
+
+    def find(self, low: int, degree: int, target: float):
+        # Row index of the entry whose cumulative weight interval contains target
+        position = 0
+        step = 1 << (degree.bit_length() - 1)
+        while step:
+            following = position + step
+            if following <= degree and self.tree[low + following - 1] <= target:
+                position = following
+                target -= self.tree[low + following - 1]
+            step >>= 1
+        return min(position, degree - 1)
+
+
+class WerwCsrWalker:
+    """WERW state over the CSR arrays that can be advanced a few walks at a time.
+
+    The running per-node weight sums and the hub Fenwick trees are Python lists, which are
+    much faster than NumPy scalars in the per-step loops; omega is an int64 array.array,
+    as fast to index and exposed without copies by scores().
+    """
+    walks: int
+
+    def __init__(self, csr: CsrGraph, kappa: int, seed=None, hub_threshold: int = DEFAULT_HUB_THRESHOLD):
+        self.csr = csr
+        self.kappa = kappa
+        self.rng = np.random.default_rng(seed)
+        self.start_sampler = AliasSampler(csr.nodes, csr.degrees()[csr.nodes])
+        uniform = random.Random(int(self.rng.integers(2 ** 63)))
+
+        offsets = csr.offsets.tolist()
+        neighbors = csr.neighbors.tolist()
+        edge_ids = csr.edge_ids.tolist()
+        omega = array("q", (csr.edge_u >= 0).astype(np.int64).tobytes())
+        weight_sums = csr.degrees().tolist()  # every incident weight starts at 1
+        hubs = np.flatnonzero(csr.degrees() > hub_threshold).tolist()
+        is_hub = [False] * csr.node_bound
+        for node in hubs:
+            is_hub[node] = True
+        fenwick = FenwickRows(offsets, [omega[e] for e in edge_ids], hubs)
+        self.state = (offsets, neighbors, edge_ids, omega, weight_sums, is_hub, fenwick, uniform)
+        self.buffers = WalkBuffers(csr.node_bound, kappa)
+        self.walks = 0
+
+    def advance(self, walks: int):
+        for vn in self.start_sampler.iter_sample(walks, self.rng):
+            MessagePropagation_csr(self.state, vn, self.kappa, self.buffers)
+        self.walks += walks
+
+    def scores(self):
+        return np.frombuffer(self.state[3], dtype=np.int64)
+
+    def omega(self):
+        # Edge weights normalized by the number of walks run so far
+        return self.scores() / self.walks
+
+
+def WERW_KPath_csr(csr: CsrGraph, kappa: int, rho: int, seed=None, hub_threshold: int = DEFAULT_HUB_THRESHOLD):
+    walker = WerwCsrWalker(csr, kappa, seed, hub_threshold)
+    walker.advance(rho)
+    return walker.omega()
+
+
+def WERW_KPath_adaptive(walker, rho: int, tolerance: float, checkpoint=None):
+    # walker is a fresh WerwCsrWalker or WerwNumbaWalker; returns (omega, walks used)
+    if checkpoint is None:
+        checkpoint = default_checkpoint(rho)
+    walks = run_until_stable(walker, rho, checkpoint, tolerance)
+    return walker.omega(), walks
+
+
+def MessagePropagation_csr(state: tuple, start: int, kappa: int, buffers: WalkBuffers):
+    offsets, neighbors, edge_ids, omega, weight_sums, is_hub, fenwick, uniform = state
+    epoch = buffers.new_walk(start)
+    marks, path, blocked = buffers.marks, buffers.path, buffers.candidates
+
+    for length in range(1, kappa):
+        current = path[length - 1]
+        low, high = offsets[current], offsets[current + 1]
+
+        # Row entries leading back into the path
+        blocked.clear()
+        for step in range(length):
+            i = bisect_left(neighbors, path[step], low, high)
+            while i < high and neighbors[i] == path[step]:
+                blocked.append(i)
+                i += 1
+
+        if len(blocked) == high - low:
+            break
+
+        if is_hub[current]:
+            # Draw from all incident weights and reject visited neighbors; a walk blocks at most kappa of them
+            for _ in range(MAX_REJECTIONS):
+                position = low + fenwick.find(low, high - low, uniform.random() * weight_sums[current])
+                if marks[neighbors[position]] != epoch:
+                    break
+            else:
+                position = scan_unvisited(state, current, blocked, marks, epoch)
+        else:
+            position = scan_unvisited(state, current, blocked, marks, epoch)
+
+        next_node = neighbors[position]
+        update_edge_weight(state, current, position, next_node)
+        path[length] = next_node
+        marks[next_node] = epoch
+
+
+def scan_unvisited(state: tuple, current: int, blocked: list, marks, epoch: int):
+    # Inverse-CDF draw over the unvisited entries; the total comes from the running sum in O(kappa)
+    offsets, neighbors, edge_ids, omega, weight_sums, is_hub, fenwick, uniform = state
+    total_weight = weight_sums[current] - sum(omega[edge_ids[i]] for i in blocked)
+    target = uniform.random() * total_weight
+
+    position = None
+    for i in range(offsets[current], offsets[current + 1]):
+        if marks[neighbors[i]] == epoch:
+            continue
+        position = i
+        target -= omega[edge_ids[i]]
+        if target < 0:
+            break
+    return position
+
+
+def update_edge_weight(state: tuple, current: int, position: int, next_node: int):
+    offsets, neighbors, edge_ids, omega, weight_sums, is_hub, fenwick, uniform = state
+    edge_id = edge_ids[position]
+    omega[edge_id] += 1
+    weight_sums[current] += 1
+    weight_sums[next_node] += 1
+
+    if is_hub[current]:
+        fenwick.add(offsets[current], offsets[current + 1] - offsets[current], position - offsets[current], 1)
+    if is_hub[next_node]:
+        low, high = offsets[next_node], offsets[next_node + 1]
+        twin = bisect_left(neighbors, current, low, high)
+        while edge_ids[twin] != edge_id:
+            twin += 1
+        fenwick.add(low, high - low, twin - low, 1)
@@ -1,7 +1,16 @@
+import heapq
 import random
-import networkit as nk
+import warnings
 from networkit import Graph
 from csv_writer import CsvWriter
+from start_sampler import degree_start_sampler
+from walk_buffers import WalkBuffers
+from csr_graph import csr_from_networkit
+from graph_loader import load_graph
+from profiler import profiler
+from erw_kpath_csr import edge_centrality_from_array
+from werw_kpath_csr import WerwCsrWalker, WERW_KPath_adaptive, DEFAULT_HUB_THRESHOLD
+from walk_kernels_numba import NUMBA_AVAILABLE, WerwNumbaWalker
 
 
 
@@ -26,14 +35,21 @@ def initialize_weights(G: Graph):
 
 
 def WERW_KPath(G: Graph, kappa: int, rho: int):
-    normalized_degrees = assign_normalized_degree(G)
-    omega = initialize_weights(G)
-
-    for i in range(rho):
-        vn = random.choices(list(G.iterNodes()), weights=list(normalized_degrees.values()), k=1)[0]
-        #(f"\nIterazione {i + 1}:")
-        #print(f"Nodo di partenza scelto: {vn}")
-        MessagePropagation(G, vn, kappa, omega)
+    with profiler.phase("degree_normalization"):
+        normalized_degrees = assign_normalized_degree(G)
+    with profiler.phase("weight_init"):
+        omega = initialize_weights(G)
+        weight_sums = initialize_weight_sums(G, omega)
+    with profiler.phase("start_sampling"):
+        # Seeded from the random module so that random.seed still makes runs reproducible
+        start_nodes = degree_start_sampler(G, normalized_degrees).iter_sample(rho, random.getrandbits(64))
+    buffers = WalkBuffers(G.upperNodeIdBound(), kappa)
+
+    with profiler.phase("stepping"):
+        for i, vn in enumerate(start_nodes):
+            #(f"\nIterazione {i + 1}:")
+            #print(f"Nodo di partenza scelto: {vn}")
+            MessagePropagation(G, vn, kappa, omega, weight_sums, buffers)
 
         # Debug: #print current weights after each iteration
         #print("Current edge weights:")
@@ -49,25 +65,30 @@ def WERW_KPath(G: Graph, kappa: int, rho: int):
     return omega
 
 
-def MessagePropagation(G: Graph, start: int, kappa: int, omega: dict):
-    path = [start]
-    visited_nodes = set([start])
+def MessagePropagation(G: Graph, start: int, kappa: int, omega: dict, weight_sums: dict, buffers: WalkBuffers = None):
+    if buffers is None:
+        buffers = WalkBuffers(G.upperNodeIdBound(), kappa)
+    epoch = buffers.new_walk(start)
+    marks, path, unvisited_neighbors = buffers.marks, buffers.path, buffers.candidates
+    length = 1
     #print(f"Cammino: {start}", end="")
 
     for _ in range(kappa - 1):  # -1 because we start with one node
-        current = path[-1]
-        unvisited_neighbors = [
+        current = path[length - 1]
+        unvisited_neighbors.clear()
+        unvisited_neighbors.extend(
             neighbor for neighbor in G.iterNeighbors(current)
-            if neighbor not in visited_nodes
-        ]
+            if marks[neighbor] != epoch
+        )
 
         if not unvisited_neighbors:
            #print(" (terminato: nessun vicino non visitato)")
            break  # No more unvisited neighbors, end the path
 
-        # Calculate probabilities for unvisited neighbors
+        # Calculate probabilities for unvisited neighbors, all sharing one O(kappa) denominator
+        total_weight = unvisited_weight(omega, weight_sums, current, path, length)
         edge_probs = [
-            calculate_probability(G, current, neighbor, omega, visited_nodes)
+            calculate_probability(omega, current, neighbor, total_weight)
             for neighbor in unvisited_neighbors
         ]
 
@@ -76,23 +97,37 @@ def MessagePropagation(G: Graph, start: int, kappa: int, omega: dict):
         #print(f" -> {next_node}", end="")
 
         # Update edge weight (only once)
-        update_edge_weight(omega, current, next_node)
+        update_edge_weight(omega, current, next_node, weight_sums)
 
         # Add to path and mark as visited
-        path.append(next_node)
-        visited_nodes.add(next_node)
-
-    if len(path) == kappa:
+        path[length] = next_node
+        length += 1
+        marks[next_node] = epoch
+
+    if profiler.enabled:
+        profiler.observe("walk_hops", length - 1)
+        profiler.count("hops", length - 1)
+    if length == kappa:
         """#print(" (lunghezza massima raggiunta)")"""
         #print()  # New line after the path
 
 
-def calculate_probability(G: Graph, vn: int, e: int, omega: dict, visited_nodes: set):
-    # Calculate the sum of weights only for unvisited neighbors
-    total_weight = sum(get_edge_weight(omega, vn, neighbor)
-                       for neighbor in G.iterNeighbors(vn)
-                       if neighbor not in visited_nodes)
+def initialize_weight_sums(G: Graph, omega: dict):
+    # Running sum of the incident edge weights of every node
+    weight_sums = {node: 0 for node in G.iterNodes()}
+    for (u, v), weight in omega.items():
+        weight_sums[u] += weight
+        if u != v:
+            weight_sums[v] += weight
+    return weight_sums
+
+
+def unvisited_weight(omega: dict, weight_sums: dict, vn: int, path: list, length: int):
+    # Sum of weights only for unvisited neighbors: the running sum minus the edges back into the path
+    return weight_sums[vn] - sum(omega.get((min(vn, v), max(vn, v)), 0) for v in path[:length])
 
+
+def calculate_probability(omega: dict, vn: int, e: int, total_weight: int):
     # If all neighbors are visited, return 0 to avoid division by zero
     if total_weight == 0:
         return 0
@@ -100,12 +135,17 @@ def calculate_probability(G: Graph, vn: int, e: int, omega: dict, visited_nodes:
     return get_edge_weight(omega, vn, e) / total_weight
 
 
-def update_edge_weight(omega: dict, u: int, v: int):
+def update_edge_weight(omega: dict, u: int, v: int, weight_sums: dict = None):
     if u < v:
         omega[(u, v)] += 1
     else:
         omega[(v, u)] += 1
 
+    if weight_sums is not None:
+        weight_sums[u] += 1
+        if u != v:
+            weight_sums[v] += 1
+
 
 def get_edge_weight(omega: dict, u: int, v: int):
     if u < v:
@@ -114,22 +154,57 @@ def get_edge_weight(omega: dict, u: int, v: int):
         return omega.get((v, u), 1)
 
 
-def werw_centrality_algorithm(G: Graph):
+def werw_centrality_algorithm(G: Graph, backend: str = "dict", seed=None, hub_threshold: int = DEFAULT_HUB_THRESHOLD,
+                              tolerance: float = None, checkpoint: int = None, return_walks: bool = False,
+                              top_k: int = None):
+    # With a tolerance the walks stop early once the ranking is stable between checkpoints;
+    # return_walks=True also returns the number of walks actually run;
+    # top_k=k returns only the k most central edges instead of all m
     kappa = 20  # Maximum path length
     rho = G.numberOfEdges()  # Number of iterations
 
+    if backend == "numba" and not NUMBA_AVAILABLE:
+        warnings.warn("numba is not installed, falling back to the csr backend")
+        backend = "csr"
+    if backend in ("csr", "numba"):
+        with profiler.phase("csr_conversion"):
+            csr = csr_from_networkit(G)
+        with profiler.phase("weight_init"):
+            if backend == "numba":
+                walker = WerwNumbaWalker(csr, kappa, seed)
+            else:
+                walker = WerwCsrWalker(csr, kappa, seed, hub_threshold)
+        with profiler.phase("stepping"):
+            if tolerance is None:
+                walker.advance(rho)
+                omega, walks = walker.omega(), rho
+            else:
+                omega, walks = WERW_KPath_adaptive(walker, rho, tolerance, checkpoint)
+        with profiler.phase("sorting"):
+            edge_centrality_sorted = edge_centrality_from_array(csr, omega, top_k)
+        return (edge_centrality_sorted, walks) if return_walks else edge_centrality_sorted
+    if backend != "dict":
+        raise ValueError(f"unknown WERW backend: {backend}")
+    if tolerance is not None:
+        raise ValueError("early stopping needs an array backend, use backend=\"csr\" or \"numba\"")
+
     omega = WERW_KPath(G, kappa, rho)
 
-    edge_centrality = [(u, v, weight) for (u, v), weight in omega.items()]
-    edge_centrality_sorted = sorted(edge_centrality, key=lambda x: x[2], reverse=True)
+    with profiler.phase("sorting"):
+        if top_k is None:
+            edge_centrality = [(u, v, weight) for (u, v), weight in omega.items()]
+            edge_centrality_sorted = sorted(edge_centrality, key=lambda x: x[2], reverse=True)
+        else:
+            # Bounded heap over the dict: only the k selected edges become result rows
+            best = heapq.nlargest(top_k, omega.items(), key=lambda item: item[1])
+            edge_centrality_sorted = [(u, v, weight) for (u, v), weight in best]
 
-    return edge_centrality_sorted
+    return (edge_centrality_sorted, rho) if return_walks else edge_centrality_sorted
 
 
 def main():
     # Load graph
-    reader = nk.graphio.EdgeListReader(separator=" ", firstNode=0, continuous=False, directed=False)
-    G = reader.read("./graph/graph(n=4, m=5).txt")
+    G = load_graph("./graph/graph(n=4, m=5).txt")
     #print(f"Grafo caricato. Nodi: {G.numberOfNodes()}, Archi: {G.numberOfEdges()}")
 
     edge_centrality_sorted = werw_centrality_algorithm(G)
@@ -140,7 +215,9 @@ def main():
         dict_csv_row = {"edge": f"{u}, {v}", "centrality": weight}
         csv_data.append(dict_csv_row)
         #print(f"Edge ({u}, {v}): {weight}")
-    CsvWriter().write(csv_data, "./csv_files/centrality_WERW", ["edge", "centrality"])
+    with profiler.phase("csv_write"):
+        CsvWriter().write(csv_data, "./csv_files/centrality_WERW", ["edge", "centrality"])
+    profiler.dump()  # Only with KPATH_PROFILE=<report.json> set
 
 
 if __name__ == "__main__":